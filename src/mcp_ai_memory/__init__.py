@@ -2,7 +2,8 @@
 
 from importlib.metadata import version, PackageNotFoundError
 
-# Lazy imports to avoid circular import issues when running with python -m
+# Lazy imports to avoid circular import issues when running with python -m,
+# and so importing the package does not pull in mem0 and the LLM clients
 def __getattr__(name: str):
     if name == "create_server":
         from .server import create_server
@@ -18,7 +19,10 @@ def __getattr__(name: str):
         return DEFAULT_USER_ID
     raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
 
-from .config import DEFAULT_USER_ID
+
+def __dir__() -> list[str]:
+    return list(__all__)
+
 
 try:
     __version__ = version("mcp-ai-memory")
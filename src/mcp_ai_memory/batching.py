@@ -0,0 +1,209 @@
+"""Request coalescing for Mem0 calls."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable, Coroutine, Hashable
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple, TypeVar
+
+logger = logging.getLogger("mcp_ai_memory")
+
+_T = TypeVar("_T")
+
+
+@dataclass
+class _PendingBatch:
+    """Conversations waiting to be written together."""
+
+    add_func: Callable[..., Any]
+    kwargs: Dict[str, Any]
+    conversations: List[List[Dict[str, str]]] = field(default_factory=list)
+    futures: List[asyncio.Future[Tuple[Any, int]]] = field(default_factory=list)
+    timer: Optional[asyncio.TimerHandle] = None
+
+
+class AddBatcher:
+    """Coalesce concurrent add calls that share a scope into one ``client.add``.
+
+    Calls with the same key that arrive within ``window_ms`` of the first one are
+    merged into a single conversation, so Mem0 runs fact extraction once for the
+    whole burst. Mem0's result cannot be attributed back to individual inputs,
+    so every caller in a batch receives the combined result.
+    """
+
+    def __init__(
+        self,
+        run: Callable[..., Awaitable[Any]],
+        window_ms: float = 20.0,
+        max_size: int = 16,
+    ) -> None:
+        """Create a batcher.
+
+        Args:
+            run: Coroutine function used to execute the blocking add call,
+                called as ``run(add_func, conversation, **kwargs)``.
+            window_ms: How long to wait for more calls after the first one.
+            max_size: Flush as soon as this many calls are pending.
+        """
+        self._run = run
+        self._window = window_ms / 1000.0
+        self._max_size = max(1, max_size)
+        self._pending: Dict[Hashable, _PendingBatch] = {}
+        # Strong references so running writes aren't garbage-collected
+        self._writes: Set[asyncio.Task[None]] = set()
+
+    async def add(
+        self,
+        key: Hashable,
+        add_func: Callable[..., Any],
+        conversation: List[Dict[str, str]],
+        kwargs: Dict[str, Any],
+    ) -> tuple[Any, int]:
+        """Queue a conversation and wait for its batch to be written.
+
+        Args:
+            key: Batching key; calls are only merged when keys are equal, so it
+                must cover everything in ``kwargs``.
+            add_func: The Mem0 ``add`` method to call.
+            conversation: Messages to store.
+            kwargs: Keyword arguments for ``add_func``.
+
+        Returns:
+            Tuple of (Mem0 result for the whole batch, number of calls merged).
+        """
+        loop = asyncio.get_running_loop()
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = _PendingBatch(add_func=add_func, kwargs=kwargs)
+            batch.timer = loop.call_later(self._window, self._flush, key)
+            self._pending[key] = batch
+
+        future: asyncio.Future[Tuple[Any, int]] = loop.create_future()
+        batch.conversations.append(conversation)
+        batch.futures.append(future)
+        if len(batch.futures) >= self._max_size:
+            self._flush(key)
+        return await future
+
+    def _flush(self, key: Hashable) -> None:
+        """Detach the pending batch for ``key`` and start writing it."""
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        task = asyncio.get_running_loop().create_task(self._write(batch))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    async def _write(self, batch: _PendingBatch) -> None:
+        """Write a batch and resolve every waiting caller."""
+        merged = [message for conversation in batch.conversations for message in conversation]
+        size = len(batch.futures)
+        if size > 1:
+            logger.debug("Coalesced %d add_memory calls into one write", size)
+        try:
+            result = await self._run(batch.add_func, merged, **batch.kwargs)
+        except Exception as e:
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for future in batch.futures:
+                if not future.done():
+                    future.set_result((result, size))
+        finally:
+            # Cancelled mid-write: don't leave callers waiting forever
+            for future in batch.futures:
+                if not future.done():
+                    future.cancel()
+
+
+class SingleFlight:
+    """Share one in-flight call among concurrent callers with the same key.
+
+    The first caller for a key starts the call; callers that arrive before it
+    finishes await the same task instead of issuing a duplicate request.
+    """
+
+    def __init__(self) -> None:
+        """Create an empty registry of in-flight calls."""
+        self._inflight: Dict[Hashable, asyncio.Task[Any]] = {}
+
+    async def run(self, key: Hashable, call: Callable[[], Coroutine[Any, Any, _T]]) -> _T:
+        """Run ``call()`` unless a call for ``key`` is already in flight.
+
+        Args:
+            key: Identifies calls whose results are interchangeable.
+            call: Zero-argument coroutine function to start on a miss.
+
+        Returns:
+            The result of the shared call.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(call())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so one cancelled caller doesn't cancel the call for the rest
+        return await asyncio.shield(task)
+
+
+class WriteBehindQueue:
+    """Run queued write jobs in the background, one at a time and in order.
+
+    Callers hand over a zero-argument coroutine function and return without
+    waiting for it. A single worker task, started on first use, runs the jobs
+    sequentially so writes land in the order they were accepted.
+    """
+
+    def __init__(self, max_size: int = 1024) -> None:
+        """Create a queue.
+
+        Args:
+            max_size: Maximum number of pending jobs; ``submit`` refuses more.
+        """
+        self._queue: asyncio.Queue[Callable[[], Awaitable[Any]]] = asyncio.Queue(maxsize=max(1, max_size))
+        self._worker: Optional[asyncio.Task[None]] = None
+
+    def submit(self, job: Callable[[], Awaitable[Any]]) -> bool:
+        """Enqueue ``job`` without waiting for it.
+
+        Args:
+            job: Zero-argument coroutine function performing the write.
+
+        Returns:
+            False if the queue is full and the caller should write inline.
+        """
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            return False
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+        return True
+
+    async def _run(self) -> None:
+        """Worker loop: run jobs until cancelled."""
+        while True:
+            job = await self._queue.get()
+            try:
+                await job()
+            except Exception as e:
+                logger.error("Background write failed: %s", e)
+            finally:
+                self._queue.task_done()
+
+    async def drain(self) -> None:
+        """Wait for every accepted job to finish, then stop the worker."""
+        if self._worker is None:
+            return
+        if not self._worker.done():
+            await self._queue.join()
+        self._worker.cancel()
+        self._worker = None
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
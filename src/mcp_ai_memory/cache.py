@@ -0,0 +1,229 @@
+"""Small in-process caches for Mem0 read results."""
+
+from __future__ import annotations
+
+import hashlib
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Generic, Hashable, List, Optional, Sequence, Tuple, TypeVar, cast
+
+import numpy as np
+
+_V = TypeVar("_V")
+
+
+class TTLCache(Generic[_V]):
+    """Bounded LRU cache whose entries expire after a fixed time-to-live.
+
+    Not thread-safe; it is only touched from the event loop.
+    """
+
+    def __init__(self, max_size: int = 512, ttl: float = 30.0) -> None:
+        """Create a cache.
+
+        Args:
+            max_size: Maximum number of entries; the least recently used entry
+                is evicted first.
+            ttl: Seconds an entry stays valid. ``0`` disables the cache.
+        """
+        self._max_size = max(1, max_size)
+        self._ttl = ttl
+        self._data: OrderedDict[Hashable, Tuple[float, _V]] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether entries are stored at all."""
+        return self._ttl > 0
+
+    def get(self, key: Hashable) -> Optional[_V]:
+        """Return the cached value for ``key``, or None if missing or expired."""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: _V) -> None:
+        """Store ``value`` under ``key``, evicting the oldest entry if full."""
+        if not self.enabled:
+            return
+        self._data[key] = (time.monotonic() + self._ttl, value)
+        self._data.move_to_end(key)
+        if len(self._data) > self._max_size:
+            self._data.popitem(last=False)
+
+    def discard(self, key: Hashable) -> None:
+        """Drop the entry for ``key`` if there is one."""
+        self._data.pop(key, None)
+
+    def discard_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Drop every entry whose key satisfies ``predicate``."""
+        for key in [k for k in self._data if predicate(k)]:
+            del self._data[key]
+
+    def clear(self) -> None:
+        """Drop every entry, e.g. after a write that may change results."""
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+@dataclass
+class _SemanticEntry:
+    """One cached response and the unit-length embedding of its query."""
+
+    scope: Hashable
+    vector: np.ndarray
+    value: str
+    expires_at: float
+
+
+class SemanticCache:
+    """Cache search responses by query-embedding similarity.
+
+    A lookup hits when a live entry in the same scope has cosine similarity of
+    at least ``threshold`` with the new query, so paraphrased repeats of a
+    question reuse the earlier response. Entries are evicted least recently
+    used first. Not thread-safe; it is only touched from the event loop.
+    """
+
+    def __init__(self, max_size: int = 1024, threshold: float = 0.95, ttl: float = 300.0) -> None:
+        """Create a cache.
+
+        Args:
+            max_size: Maximum number of entries across all scopes.
+            threshold: Minimum cosine similarity for a hit.
+            ttl: Seconds an entry stays valid.
+        """
+        self._max_size = max(1, max_size)
+        self._threshold = threshold
+        self._ttl = ttl
+        self._ids = itertools.count()
+        self._entries: OrderedDict[int, _SemanticEntry] = OrderedDict()
+        self._by_scope: Dict[Hashable, Dict[int, None]] = {}
+
+    @staticmethod
+    def _normalize(vector: Sequence[float]) -> Optional[np.ndarray]:
+        """Return ``vector`` as unit-length float32, or None if it is zero."""
+        arr = np.asarray(vector, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(arr))
+        if norm == 0.0:
+            return None
+        return arr / norm
+
+    def get(self, scope: Hashable, vector: Sequence[float]) -> Optional[str]:
+        """Return the closest cached response for ``scope``, if similar enough.
+
+        Args:
+            scope: Everything besides the query that affects the result.
+            vector: Embedding of the query.
+
+        Returns:
+            The cached response, or None on a miss.
+        """
+        ids = self._by_scope.get(scope)
+        query = self._normalize(vector)
+        if not ids or query is None:
+            return None
+
+        now = time.monotonic()
+        for entry_id in [i for i in ids if self._entries[i].expires_at <= now]:
+            self._remove(entry_id)
+        if not ids:
+            return None
+
+        candidates = list(ids)
+        vectors = [self._entries[i].vector for i in candidates]
+        if any(v.shape != query.shape for v in vectors):
+            # Embedder changed dimensions; nothing here is comparable
+            return None
+        scores = np.stack(vectors) @ query
+        best = int(np.argmax(scores))
+        if float(scores[best]) < self._threshold:
+            return None
+        entry_id = candidates[best]
+        self._entries.move_to_end(entry_id)
+        return self._entries[entry_id].value
+
+    def set(self, scope: Hashable, vector: Sequence[float], value: str) -> None:
+        """Cache ``value`` for a query embedding within ``scope``."""
+        unit = self._normalize(vector)
+        if unit is None:
+            return
+        entry_id = next(self._ids)
+        self._entries[entry_id] = _SemanticEntry(scope, unit, value, time.monotonic() + self._ttl)
+        self._by_scope.setdefault(scope, {})[entry_id] = None
+        while len(self._entries) > self._max_size:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, entry_id: int) -> None:
+        """Drop one entry from both indexes."""
+        entry = self._entries.pop(entry_id)
+        ids = self._by_scope[entry.scope]
+        del ids[entry_id]
+        if not ids:
+            del self._by_scope[entry.scope]
+
+    def discard_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Drop every entry whose scope satisfies ``predicate``."""
+        for scope in [s for s in self._by_scope if predicate(s)]:
+            for entry_id in self._by_scope.pop(scope):
+                del self._entries[entry_id]
+
+    def clear(self) -> None:
+        """Drop every entry, e.g. after a write that may change results."""
+        self._entries.clear()
+        self._by_scope.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class MemoizedEmbedder:
+    """Wrap a Mem0 embedder so embeddings of repeated text are reused.
+
+    Mem0 re-embeds the same strings often: recurring queries, facts that are
+    extracted again on every add, and the semantic cache embedding a query
+    right before ``client.search`` does. Results are keyed by memory action
+    and a digest of the text, and stored as numpy arrays, which take a
+    fraction of the memory of Python float lists.
+    Thread-safe, since Mem0 calls the embedder from executor threads.
+    """
+
+    def __init__(self, embedder: Any, max_size: int = 256) -> None:
+        """Create the wrapper.
+
+        Args:
+            embedder: The client's original ``embedding_model``.
+            max_size: Number of embeddings to remember.
+        """
+        self._embedder = embedder
+        self._max_size = max(1, max_size)
+        self._memo: OrderedDict[Tuple[Optional[str], bytes], np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def embed(self, text: str, memory_action: Optional[str] = None) -> List[float]:
+        """Embed ``text``, reusing the earlier result for the same input."""
+        key = (memory_action, hashlib.blake2b(text.encode(), digest_size=16).digest())
+        with self._lock:
+            vector = self._memo.get(key)
+            if vector is not None:
+                self._memo.move_to_end(key)
+                return cast(List[float], vector.tolist())
+        result = self._embedder.embed(text, memory_action)
+        with self._lock:
+            self._memo[key] = np.asarray(result, dtype=np.float64)
+            if len(self._memo) > self._max_size:
+                self._memo.popitem(last=False)
+        return cast(List[float], result)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._embedder, name)
@@ -4,10 +4,14 @@ from __future__ import annotations
 
 import logging
 import os
-from typing import Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
 import openai
-from mem0 import Memory
+
+from .cache import MemoizedEmbedder
+
+if TYPE_CHECKING:
+    from mem0 import Memory
 
 logger = logging.getLogger("mcp_ai_memory")
 
@@ -35,9 +39,9 @@ def _patch_openai_timeout():
             original_async_init(self, *args, **kwargs)
         openai.AsyncOpenAI.__init__ = patched_async_init
         
-        logger.info(f"OpenAI clients patched with default timeout: {timeout}s")
+        logger.info("OpenAI clients patched with default timeout: %ss", timeout)
     except Exception as e:
-        logger.warning(f"Failed to patch OpenAI timeout: {e}")
+        logger.warning("Failed to patch OpenAI timeout: %s", e)
 
 
 def get_env(key: str, default: Optional[str] = None) -> Optional[str]:
@@ -45,12 +49,16 @@ def get_env(key: str, default: Optional[str] = None) -> Optional[str]:
     return os.getenv(key, default)
 
 
+_TRUE_VALUES = frozenset({"1", "true", "yes", "on"})
+_FALSE_VALUES = frozenset({"0", "false", "no", "off"})
+
+
 def get_env_bool(key: str, default: bool = False) -> bool:
     """Get boolean environment variable."""
     value = os.getenv(key, "").lower()
-    if value in ("1", "true", "yes", "on"):
+    if value in _TRUE_VALUES:
         return True
-    if value in ("0", "false", "no", "off"):
+    if value in _FALSE_VALUES:
         return False
     return default
 
@@ -160,7 +168,7 @@ def _build_llm_config() -> Dict[str, Any]:
         if base_url:
             config["config"]["openai_base_url"] = base_url
 
-    logger.info(f"Configured LLM provider: {provider}, model: {model}")
+    logger.info("Configured LLM provider: %s, model: %s", provider, model)
     return config
 
 
@@ -214,7 +222,7 @@ def _build_embedder_config() -> Dict[str, Any]:
         if base_url:
             config["config"]["base_url"] = base_url
 
-    logger.info(f"Configured embedder provider: {provider}, model: {model}, dims: {dims}")
+    logger.info("Configured embedder provider: %s, model: %s, dims: %s", provider, model, dims)
     return config
 
 
@@ -242,7 +250,7 @@ def _build_vector_store_config() -> Dict[str, Any]:
         if qdrant_path:
             # Local file storage (no Qdrant server needed)
             config["config"]["path"] = qdrant_path
-            logger.info(f"Configured Qdrant with local storage: {qdrant_path}")
+            logger.info("Configured Qdrant with local storage: %s", qdrant_path)
         elif qdrant_host:
             # Remote Qdrant server
             config["config"]["host"] = qdrant_host
@@ -250,7 +258,20 @@ def _build_vector_store_config() -> Dict[str, Any]:
             qdrant_api_key = get_env("QDRANT_API_KEY")
             if qdrant_api_key:
                 config["config"]["api_key"] = qdrant_api_key
-            logger.info(f"Configured Qdrant with remote server: {qdrant_host}")
+            if get_env_bool("QDRANT_PREFER_GRPC", False):
+                # mem0 has no gRPC option; hand it a ready-made client instead
+                from qdrant_client import QdrantClient
+
+                grpc_port = get_env_int("QDRANT_GRPC_PORT", 6334)
+                config["config"]["client"] = QdrantClient(
+                    host=qdrant_host,
+                    port=config["config"]["port"],
+                    grpc_port=grpc_port,
+                    prefer_grpc=True,
+                    api_key=qdrant_api_key,
+                )
+                logger.info("Using gRPC for Qdrant on port %s", grpc_port)
+            logger.info("Configured Qdrant with remote server: %s", qdrant_host)
         else:
             # Default to local file storage
             config["config"]["path"] = "./mem0_data"
@@ -291,6 +312,36 @@ def _build_vector_store_config() -> Dict[str, Any]:
     return config
 
 
+def _enable_qdrant_quantization(client: Memory) -> None:
+    """Turn on int8 scalar quantization for the client's Qdrant collection.
+
+    Qdrant keeps the quantized vectors in RAM, searches them first and
+    rescores the best candidates against the original vectors, so memory
+    traffic per search drops about 4x at a small recall cost. Only Qdrant
+    servers support this; local storage ignores it.
+    """
+    from qdrant_client import models
+
+    vector_store = client.vector_store
+    if getattr(vector_store, "is_local", False):
+        logger.warning("QDRANT_QUANTIZATION only applies to a Qdrant server; ignoring it for local storage")
+        return
+    try:
+        vector_store.client.update_collection(
+            collection_name=vector_store.collection_name,
+            quantization_config=models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=True,
+                )
+            ),
+        )
+        logger.info("Enabled int8 quantization for Qdrant collection: %s", vector_store.collection_name)
+    except Exception as e:
+        logger.warning("Failed to enable Qdrant quantization: %s", e)
+
+
 def create_mem0_client() -> Memory:
     """Create and configure a Mem0 Memory client based on environment variables.
 
@@ -300,6 +351,9 @@ def create_mem0_client() -> Memory:
     Returns:
         Memory: Configured Mem0 Memory client
     """
+    # Imported here so loading the server doesn't pay for mem0's import
+    from mem0 import Memory
+
     config: Dict[str, Any] = {}
 
     # Build LLM configuration
@@ -331,9 +385,9 @@ def create_mem0_client() -> Memory:
         file_prompt = get_custom_prompt_from_file(custom_prompt_file)
         if file_prompt:
             config["custom_fact_extraction_prompt"] = file_prompt
-            logger.info(f"Using custom fact extraction prompt from file: {custom_prompt_file}")
+            logger.info("Using custom fact extraction prompt from file: %s", custom_prompt_file)
         else:
-            logger.warning(f"Failed to load prompt from file: {custom_prompt_file}, using default")
+            logger.warning("Failed to load prompt from file: %s, using default", custom_prompt_file)
             try:
                 from .prompts import get_fact_extraction_prompt
             except ImportError:
@@ -347,7 +401,7 @@ def create_mem0_client() -> Memory:
             from prompts import get_fact_extraction_prompt
         
         config["custom_fact_extraction_prompt"] = get_fact_extraction_prompt(prompt_type)
-        logger.info(f"Using built-in fact extraction prompt (type={prompt_type})")
+        logger.info("Using built-in fact extraction prompt (type=%s)", prompt_type)
 
     # Optional: Graph memory configuration
     if get_env_bool("ENABLE_GRAPH_MEMORY", False):
@@ -362,7 +416,28 @@ def create_mem0_client() -> Memory:
         logger.info("Graph memory enabled with Neo4j")
 
     logger.info("Creating Mem0 Memory client with custom configuration")
-    return Memory.from_config(config)
+    client = Memory.from_config(config)
+    tune_mem0_client(client)
+    return client
+
+
+def tune_mem0_client(client: Memory) -> None:
+    """Apply the embedding cache and Qdrant quantization settings to a client.
+
+    Safe to call again on the same client, e.g. after ``client.reset()``
+    has rebuilt parts of it.
+
+    Args:
+        client: The Mem0 client to adjust in place.
+    """
+    # Reuse embeddings of repeated text instead of calling the provider again
+    embed_cache_size = get_env_int("EMBED_CACHE_SIZE", 1024)
+    if embed_cache_size > 0 and not isinstance(client.embedding_model, MemoizedEmbedder):
+        client.embedding_model = MemoizedEmbedder(client.embedding_model, max_size=embed_cache_size)
+        logger.info("Embedding cache enabled (size=%d)", embed_cache_size)
+
+    if get_env("VECTOR_STORE_PROVIDER", "qdrant") == "qdrant" and get_env_bool("QDRANT_QUANTIZATION", False):
+        _enable_qdrant_quantization(client)
 
 
 # Default user ID for memory operations
@@ -15,13 +15,27 @@ def get_current_date() -> str:
     return datetime.now().strftime("%Y-%m-%d")
 
 
+# =============================================================================
+# Dynamic Suffix
+# =============================================================================
+# The date is the only part of the prompts that changes, so it is kept at the
+# very end. Everything before it stays byte-identical across days, which lets
+# providers with prefix caching (OpenAI, Anthropic, vLLM) reuse the long
+# instruction and few-shot body.
+
+_DYNAMIC_SUFFIX = """
+Today's date is {current_date}.
+Following is a conversation. Extract all relevant facts from it and return them in JSON format.
+"""
+
+
 # =============================================================================
 # Default Fact Extraction Prompt
 # =============================================================================
 # This prompt is used by mem0 to extract facts from user input.
 # It supports both personal preferences AND project/technical knowledge.
 
-DEFAULT_FACT_EXTRACTION_PROMPT = """You are a Knowledge and Information Organizer, specialized in accurately storing facts, memories, preferences, and knowledge. 
+_DEFAULT_STATIC_PREFIX = """You are a Knowledge and Information Organizer, specialized in accurately storing facts, memories, preferences, and knowledge. 
 Your primary role is to extract ALL relevant pieces of information from conversations and organize them into distinct, manageable facts.
 This includes personal preferences, project knowledge, technical documentation, and any other useful information.
 
@@ -70,7 +84,6 @@ Output: {{"facts" : ["Coding convention requires type hints on all functions", "
 Return the facts in a JSON format as shown above.
 
 Remember the following:
-- Today's date is {current_date}.
 - Do not return anything from the custom few shot example prompts provided above.
 - If you do not find anything relevant in the below conversation, return an empty list for "facts".
 - Create facts from BOTH personal information AND technical/project knowledge.
@@ -78,17 +91,17 @@ Remember the following:
 - Make sure to return the response in JSON format with a key "facts" and a list of strings as value.
 - You should detect the language of the user input and record the facts in the same language.
 - IMPORTANT: Extract ALL meaningful information, including project descriptions, technical details, and documentation.
-
-Following is a conversation. Extract all relevant facts from it and return them in JSON format.
 """
 
+DEFAULT_FACT_EXTRACTION_PROMPT = _DEFAULT_STATIC_PREFIX + _DYNAMIC_SUFFIX
+
 
 # =============================================================================
 # Personal-Only Fact Extraction Prompt (Original mem0 style)
 # =============================================================================
 # Use this if you only want to store personal preferences, not project knowledge.
 
-PERSONAL_ONLY_FACT_EXTRACTION_PROMPT = """You are a Personal Information Organizer, specialized in accurately storing facts, user memories, and preferences. 
+_PERSONAL_STATIC_PREFIX = """You are a Personal Information Organizer, specialized in accurately storing facts, user memories, and preferences. 
 Your primary role is to extract relevant pieces of information from conversations and organize them into distinct, manageable facts. 
 This allows for easy retrieval and personalization in future interactions.
 
@@ -122,16 +135,15 @@ Output: {{"facts" : ["Favourite movies are Inception and Interstellar"]}}
 Return the facts and preferences in a JSON format as shown above.
 
 Remember the following:
-- Today's date is {current_date}.
 - Do not return anything from the custom few shot example prompts provided above.
 - If you do not find anything relevant in the below conversation, return an empty list for "facts".
 - Create the facts based on the user messages only.
 - Make sure to return the response in JSON format with a key "facts" and a list of strings as value.
 - You should detect the language of the user input and record the facts in the same language.
-
-Following is a conversation. Extract all relevant facts from it and return them in JSON format.
 """
 
+PERSONAL_ONLY_FACT_EXTRACTION_PROMPT = _PERSONAL_STATIC_PREFIX + _DYNAMIC_SUFFIX
+
 
 # =============================================================================
 # Helper Functions
@@ -2,11 +2,13 @@
 
 from __future__ import annotations
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class ToolMessage(BaseModel):
     """A single message in a conversation."""
 
+    model_config = ConfigDict(frozen=True)
+
     role: str = Field(..., description="Role of the speaker, e.g., 'user' or 'assistant'.")
     content: str = Field(..., description="Full text of the utterance to store.")
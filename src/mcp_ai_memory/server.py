@@ -3,23 +3,34 @@
 from __future__ import annotations
 
 import asyncio
+import atexit
+import functools
+import hashlib
+import inspect
 import json
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
-from collections.abc import AsyncIterator
+from collections.abc import AsyncIterator, Awaitable, Callable
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Annotated, Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Annotated, Any, Dict, List, Optional, TypeVar
 
+import orjson
 from dotenv import load_dotenv
 from mcp.server.fastmcp import Context, FastMCP
-from mem0 import Memory
 from pydantic import Field
 
-from .config import create_mem0_client, DEFAULT_USER_ID
+from .batching import AddBatcher, SingleFlight, WriteBehindQueue
+from .cache import SemanticCache, TTLCache
+from .config import create_mem0_client, get_env_bool, get_env_float, get_env_int, tune_mem0_client, DEFAULT_USER_ID
 from .schemas import ToolMessage
 
+if TYPE_CHECKING:
+    # mem0 pulls in the provider SDKs; it is imported when the client is built
+    from mem0 import Memory
+
 load_dotenv()
 repo_dotenv = Path(__file__).resolve().parents[2] / ".env"
 if repo_dotenv.exists():
@@ -30,6 +41,49 @@ log_level = os.getenv("LOG_LEVEL", "INFO").upper()
 logging.basicConfig(level=getattr(logging, log_level), format="%(levelname)s %(name)s | %(message)s")
 logger = logging.getLogger("mcp_ai_memory")
 
+# Server settings, read once at import (after .env is loaded)
+_HOST = os.getenv("HOST", "0.0.0.0")
+_PORT = int(os.getenv("PORT", "8050"))
+_TRANSPORT = os.getenv("TRANSPORT", "streamable-http")
+
+_T = TypeVar("_T")
+
+# Dedicated pool for blocking Mem0 calls, kept separate from the loop's default
+# executor so embedding/LLM round-trips can't starve or be starved by other work
+_mem0_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("MEM0_WORKERS", "8")),
+    thread_name_prefix="mem0",
+)
+atexit.register(_mem0_executor.shutdown, wait=False)
+
+# Background add_memory writes requested with async_write=True; drained when
+# the server stops
+_write_queue = WriteBehindQueue(max_size=int(os.getenv("WRITE_QUEUE_SIZE", "1024")))
+
+
+async def _run_mem0(func: Callable[..., _T], *args: Any, **kwargs: Any) -> _T:
+    """Run a blocking Mem0 call on the dedicated executor."""
+    loop = asyncio.get_running_loop()
+    if kwargs:
+        return await loop.run_in_executor(_mem0_executor, functools.partial(func, *args, **kwargs))
+    # run_in_executor forwards positional args itself; no partial needed
+    return await loop.run_in_executor(_mem0_executor, func, *args)
+
+
+def _delete_memories(delete: Callable[[str], Any], memory_ids: List[str]) -> int:
+    """Delete memories one by one inside a single executor job.
+
+    Args:
+        delete: The client's bound ``delete`` method.
+        memory_ids: IDs to delete, in order.
+
+    Returns:
+        Number of memories deleted.
+    """
+    for memory_id in memory_ids:
+        delete(memory_id)
+    return len(memory_ids)
+
 
 @dataclass
 class Mem0Context:
@@ -40,47 +94,60 @@ class Mem0Context:
 
 # Global singleton for Mem0 client to avoid multiple initializations in SSE mode
 _mem0_client: Optional[Memory] = None
-_mem0_lock: Optional[asyncio.Lock] = None
+_mem0_init_future: Optional[asyncio.Future[Memory]] = None
+# Lifespan context shared by every session; it only wraps the singleton client
+_mem0_context: Optional[Mem0Context] = None
 
 
-def _get_mem0_lock() -> asyncio.Lock:
-    """Get or create the asyncio lock for Mem0 client initialization.
-    
-    asyncio.Lock must be created within an event loop context,
-    so we lazily initialize it on first use.
-    """
-    global _mem0_lock
-    if _mem0_lock is None:
-        _mem0_lock = asyncio.Lock()
-    return _mem0_lock
+def _on_mem0_client_created(future: asyncio.Future[Memory]) -> None:
+    """Publish the client once initialization finishes, or allow a retry on failure."""
+    global _mem0_client, _mem0_init_future
+    if future.cancelled() or future.exception() is not None:
+        _mem0_init_future = None
+        return
+    _mem0_client = future.result()
+    logger.info("Mem0 client initialized successfully")
 
 
 async def _get_or_create_mem0_client() -> Memory:
     """Get or create the singleton Mem0 client.
     
-    Uses double-checked locking pattern with asyncio.Lock for async safety.
-    Unlike threading.Lock, asyncio.Lock doesn't block the event loop.
+    The first caller starts initialization in a worker thread and stores the
+    resulting future; concurrent callers await that same future. Checking and
+    setting the future happens without an await in between, so no lock is needed
+    on the single-threaded event loop.
     """
-    global _mem0_client
+    global _mem0_init_future
     # Fast path: already initialized
     if _mem0_client is not None:
         return _mem0_client
-    # Slow path: need to initialize with lock
-    async with _get_mem0_lock():
-        if _mem0_client is None:
-            logger.info("Initializing Mem0 client...")
-            _mem0_client = await asyncio.to_thread(create_mem0_client)
-            logger.info("Mem0 client initialized successfully")
-        return _mem0_client
+    # Slow path: start initialization once and share the pending result
+    future = _mem0_init_future
+    if future is None:
+        logger.info("Initializing Mem0 client...")
+        future = asyncio.get_running_loop().run_in_executor(None, create_mem0_client)
+        future.add_done_callback(_on_mem0_client_created)
+        _mem0_init_future = future
+    # Shield so one cancelled waiter doesn't cancel initialization for the rest
+    return await asyncio.shield(future)
 
 
 @asynccontextmanager
 async def mem0_lifespan(server: FastMCP) -> AsyncIterator[Mem0Context]:
-    """Manage the Mem0 client lifecycle."""
-    mem0_client = await _get_or_create_mem0_client()
+    """Manage the Mem0 client lifecycle.
+
+    The client and its context are process-wide singletons: only the first
+    session initializes them, and later sessions (e.g. each SSE connection)
+    reuse the same objects without awaiting anything.
+    """
+    global _mem0_context
+    context = _mem0_context
+    if context is None:
+        context = Mem0Context(mem0_client=await _get_or_create_mem0_client())
+        _mem0_context = context
 
     try:
-        yield Mem0Context(mem0_client=mem0_client)
+        yield context
     finally:
         # Don't shutdown the client here as it's shared across connections
         pass
@@ -93,12 +160,96 @@ def create_server() -> FastMCP:
         "ai-memory",
         instructions="MCP server for local long-term memory storage",
         lifespan=mem0_lifespan,
-        host=os.getenv("HOST", "0.0.0.0"),
-        port=int(os.getenv("PORT", "8050")),
+        host=_HOST,
+        port=_PORT,
+    )
+
+    # Optional write coalescing: concurrent add_memory calls with the same scope
+    # and metadata share a single client.add (and a single extraction LLM call)
+    add_batcher: Optional[AddBatcher] = None
+    if get_env_bool("MEM0_BATCH", False):
+        add_batcher = AddBatcher(
+            _run_mem0,
+            window_ms=get_env_float("MEM0_BATCH_WINDOW_MS", 20.0),
+            max_size=get_env_int("MEM0_BATCH_SIZE", 16),
+        )
+
+    # Opt-in short-lived cache of search responses so repeated queries (common
+    # in agent loops) skip re-embedding. Keys are (user_id, digest) so a write
+    # only drops its own user's entries; writes from other processes stay
+    # invisible until the TTL runs out. Off unless SEARCH_CACHE_TTL > 0.
+    search_cache: TTLCache[str] = TTLCache(
+        max_size=get_env_int("SEARCH_CACHE_SIZE", 512),
+        ttl=get_env_float("SEARCH_CACHE_TTL", 0.0),
+    )
+
+    # Optional similarity cache: near-duplicate queries in the same scope reuse
+    # an earlier response instead of running a vector search
+    semantic_cache: Optional[SemanticCache] = None
+    if get_env_bool("SEMANTIC_CACHE", False):
+        semantic_cache = SemanticCache(
+            max_size=get_env_int("SEMCACHE_SIZE", 1024),
+            threshold=get_env_float("SEMCACHE_TAU", 0.95),
+            ttl=get_env_float("SEMCACHE_TTL", 300.0),
+        )
+
+    # Opt-in cache of serialized get_memory / get_memory_history responses keyed
+    # by (method, memory_id). Writes from this process invalidate entries; the
+    # TTL bounds staleness from other writers. Off unless GET_CACHE_TTL > 0.
+    memory_cache: TTLCache[str] = TTLCache(
+        max_size=get_env_int("GET_CACHE_SIZE", 1024),
+        ttl=get_env_float("GET_CACHE_TTL", 0.0),
     )
 
+    # Upper bound on search page size so one call can't trigger a huge ANN fetch
+    search_max_limit = get_env_int("SEARCH_MAX_LIMIT", 100)
+
+    # Identical concurrent searches share one Mem0 call
+    search_flights = SingleFlight()
+    # Bumped on every write; reads started before a write neither cache
+    # their response nor absorb searches issued after it
+    cache_generation = 0
+
+    def _invalidate_caches(
+        user_id: Optional[str] = None,
+        memory_ids: Optional[List[str]] = None,
+    ) -> None:
+        """Forget cached responses after a write.
+
+        Args:
+            user_id: The only user scope the write touched, if known; otherwise
+                every cached search response is dropped.
+            memory_ids: The only memories the write touched, if known;
+                otherwise every cached memory and history response is dropped.
+        """
+        nonlocal cache_generation
+        cache_generation += 1
+        if user_id is None:
+            search_cache.clear()
+            if semantic_cache is not None:
+                semantic_cache.clear()
+        else:
+            def in_scope(key: Any) -> bool:
+                return bool(key[0] == user_id)
+
+            search_cache.discard_where(in_scope)
+            if semantic_cache is not None:
+                semantic_cache.discard_where(in_scope)
+        if memory_ids is None:
+            memory_cache.clear()
+        else:
+            for memory_id in memory_ids:
+                memory_cache.discard(("get", memory_id))
+                memory_cache.discard(("history", memory_id))
+
+    # Bound once so the per-call scope helper reads a closure cell, not a global
+    default_user_id = DEFAULT_USER_ID
+
     def _get_client(ctx: Optional[Context]) -> Memory:
-        """Extract Mem0 client from context.
+        """Get the Mem0 client, preferring the process-wide singleton.
+        
+        Once the lifespan has initialized the client, it is returned directly
+        without walking the request context.
         
         Args:
             ctx: The MCP context containing the Mem0 client.
@@ -107,14 +258,24 @@ def create_server() -> FastMCP:
             The Mem0 Memory client.
             
         Raises:
-            RuntimeError: If context is None or invalid.
+            RuntimeError: If the client isn't initialized and context is None.
         """
+        client = _mem0_client
+        if client is not None:
+            return client
         if ctx is None:
             raise RuntimeError("Context is required but got None")
         return ctx.request_context.lifespan_context.mem0_client
 
     def _safe_json(data: Any) -> str:
         """Safely convert data to JSON string."""
+        try:
+            return orjson.dumps(
+                data, default=str, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            ).decode()
+        except TypeError:
+            # orjson rejects a few values the stdlib accepts (e.g. ints over 64 bits)
+            pass
         try:
             return json.dumps(data, ensure_ascii=False, default=str)
         except Exception as e:
@@ -122,11 +283,33 @@ def create_server() -> FastMCP:
 
     def _extract_memories(result: Any) -> List[Dict[str, Any]]:
         """Extract memory list from Mem0 result."""
-        if isinstance(result, dict) and "results" in result:
-            return result["results"]
-        if isinstance(result, list):
-            return result
-        return []
+        if isinstance(result, dict):
+            # One lookup instead of a membership test plus a subscript
+            memories = result.get("results")
+            return memories if isinstance(memories, list) else []
+        return result if isinstance(result, list) else []
+
+    def _paginate(
+        memories: List[Dict[str, Any]], offset: int, limit: int
+    ) -> tuple[List[Dict[str, Any]], bool]:
+        """Cut one page out of a Mem0 result list in place.
+
+        The list is freshly built by Mem0 for each call, so trimming it avoids
+        copying the page into a new list before serialization.
+
+        Args:
+            memories: Result list fetched with ``limit + offset + 1`` entries.
+            offset: Number of results to skip.
+            limit: Page size.
+
+        Returns:
+            Tuple of (page, whether more results exist after it).
+        """
+        has_more = len(memories) > offset + limit
+        del memories[offset + limit:]
+        if offset:
+            del memories[:offset]
+        return memories, has_more
 
     def _build_scope_kwargs(
         user_id: Optional[str] = None,
@@ -145,59 +328,244 @@ def create_server() -> FastMCP:
         Returns:
             Dict with scope filters for Mem0 API calls.
         """
-        kwargs: Dict[str, Any] = {"user_id": user_id or DEFAULT_USER_ID}
+        # **extra is a fresh dict on every call, so fill it in directly instead
+        # of allocating a second dict and merging
+        kwargs: Dict[str, Any] = extra
+        kwargs["user_id"] = user_id or default_user_id
         if agent_id:
             kwargs["agent_id"] = agent_id
         if run_id:
             kwargs["run_id"] = run_id
-        kwargs.update(extra)
         return kwargs
 
-    def _analyze_add_result(result: Any, text: str, user_id: str) -> None:
-        """Analyze and log the mem0 add result for debugging."""
-        logger.debug(f"add_memory input text: {text[:200]}...")
-        logger.debug(f"add_memory raw result: {result}")
-        
+    def _analyze_add_result(result: Any, text: str, user_id: str) -> List[str]:
+        """Build the add_memory summary, logging each entry when debugging.
+
+        Args:
+            result: Raw result returned by ``client.add``.
+            text: Input text, only used in debug output.
+            user_id: Effective user scope of the write.
+
+        Returns:
+            Summary lines describing what Mem0 changed.
+        """
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("add_memory input text: %.200s...", text)
+            logger.debug("add_memory raw result: %s", result)
+
+        summary: List[str] = []
+        saw_none = False
         if isinstance(result, dict):
             # Check for 'results' key (standard mem0 response)
             results = result.get("results", [])
-            if not results:
+            if not results and debug:
                 logger.debug(
-                    f"No memories extracted by LLM. Input: '{text[:100]}...' | "
-                    f"This usually means the LLM did not find extractable facts/preferences."
+                    "No memories extracted by LLM. Input: '%.100s...' | "
+                    "This usually means the LLM did not find extractable facts/preferences.",
+                    text,
                 )
-            else:
-                for idx, mem in enumerate(results):
-                    event = mem.get("event", "UNKNOWN")
+            # Single pass: build the summary and emit debug lines together
+            for idx, mem in enumerate(results):
+                event = mem.get("event")
+                mem_text = mem.get("memory") or mem.get("text")
+                if event == "ADD":
+                    summary.append(f"Added: {mem_text}")
+                elif event == "UPDATE":
+                    summary.append(f"Updated: {mem_text}")
+                elif event == "DELETE":
+                    summary.append(f"Deleted (obsolete): {mem_text}")
+                elif event == "NONE":
+                    saw_none = True
+                if debug:
                     memory_text = mem.get("memory", mem.get("text", "N/A"))
-                    memory_id = mem.get("id", "N/A")
                     logger.debug(
-                        f"Memory[{idx}] event={event}, id={memory_id}, "
-                        f"text='{memory_text[:100]}...'"
+                        "Memory[%d] event=%s, id=%s, text='%.100s...'",
+                        idx, event or "UNKNOWN", mem.get("id", "N/A"), memory_text,
                     )
                     if event == "NONE":
                         logger.debug(
-                            f"Memory event=NONE means LLM decided not to store this. "
-                            f"Possible reasons: duplicate, not a fact/preference, or LLM judgment."
+                            "Memory event=NONE means LLM decided not to store this. "
+                            "Possible reasons: duplicate, not a fact/preference, or LLM judgment."
                         )
-            
+
             # Log any relations (for graph memory)
             relations = result.get("relations", [])
-            if relations:
-                logger.debug(f"Relations extracted: {relations}")
+            if relations and debug:
+                logger.debug("Relations extracted: %s", relations)
+        elif debug:
+            logger.debug("Unexpected result type: %s", type(result))
+
+        if not summary:
+            # Check if it was rejected or already exists
+            if saw_none:
+                summary.append("No changes: Information already exists or was filtered by LLM.")
+            else:
+                summary.append("No memories were extracted from the input.")
+        return summary
+
+    async def _search_uncached(
+        client: Memory,
+        query: str,
+        offset: int,
+        limit: int,
+        kwargs: Dict[str, Any],
+        cache_key: tuple[str, str],
+    ) -> str:
+        """Run a search that missed the exact cache and build its response.
+
+        Args:
+            client: The Mem0 client.
+            query: Natural language query.
+            offset: Number of results to skip.
+            limit: Page size.
+            kwargs: Keyword arguments for ``client.search``.
+            cache_key: Exact-cache key for this request.
+
+        Returns:
+            The serialized search response.
+        """
+        generation = cache_generation
+        query_vector = None
+        semantic_scope = None
+        if semantic_cache is not None:
+            # With EMBED_CACHE_SIZE > 0 the embedder is memoized, so client.search
+            # reuses this embedding instead of computing it again
+            query_vector = await _run_mem0(client.embedding_model.embed, query, "search")
+            semantic_scope = (kwargs["user_id"], json.dumps([offset, kwargs], sort_keys=True, default=str))
+            cached = semantic_cache.get(semantic_scope, query_vector)
+            if cached is not None:
+                logger.debug("Semantic cache hit for query: %.50s...", query)
+                search_cache.set(cache_key, cached)
+                return cached
+
+        # Run blocking call in the Mem0 executor for concurrency support
+        result = await _run_mem0(client.search, query, **kwargs)
+        all_memories = _extract_memories(result)
+
+        paginated, has_more = _paginate(all_memories, offset, limit)
+
+        # Extract scores and summarize for the caller
+        summary = []
+        for idx, m in enumerate(paginated):
+            score = m.get("score", "N/A")
+            text = m.get("memory", m.get("text", "N/A"))
+            summary.append(f"[{idx}] (Score: {score}) {text[:100]}...")
+
+        if not summary:
+            summary.append("No relevant memories found.")
+
+        logger.info(
+            "Search returned %d results (offset=%d, limit=%d, has_more=%s) for query: %.50s...",
+            len(paginated), offset, limit, has_more, query,
+        )
+        response = _safe_json({
+            "results": paginated,
+            "summary": "\n".join(summary),
+            "count": len(paginated),
+            "offset": offset,
+            "limit": limit,
+            "has_more": has_more,
+        })
+        if generation == cache_generation:
+            # Only cache if no write landed while the search was running
+            search_cache.set(cache_key, response)
+            if semantic_cache is not None and query_vector is not None:
+                semantic_cache.set(semantic_scope, query_vector, response)
+        return response
+
+    async def _store_memory(
+        client: Memory,
+        conversation: List[Dict[str, str]],
+        kwargs: Dict[str, Any],
+        batch_key: Optional[Any],
+    ) -> tuple[Any, int]:
+        """Write a conversation to Mem0 and invalidate cached reads.
+
+        Args:
+            client: The Mem0 client.
+            conversation: Messages to store.
+            kwargs: Keyword arguments for ``client.add``.
+            batch_key: Coalescing key when write batching is enabled.
+
+        Returns:
+            Tuple of (Mem0 result, number of calls merged into the write).
+        """
+        if add_batcher is not None:
+            result, batch_size = await add_batcher.add(batch_key, client.add, conversation, kwargs)
         else:
-            logger.debug(f"Unexpected result type: {type(result)}")
+            # Run blocking call in the Mem0 executor for concurrency support
+            result, batch_size = await _run_mem0(client.add, conversation, **kwargs), 1
+        # Mem0 reports every memory the write added, updated or deleted
+        changed_ids = [mem_id for mem in _extract_memories(result) if (mem_id := mem.get("id"))]
+        _invalidate_caches(kwargs["user_id"], changed_ids)
+        return result, batch_size
+
+    def _mem0_tool(
+        error: str,
+    ) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[str]]]:
+        """Turn a tool body into an MCP tool handler.
+
+        The body takes the Mem0 client as its first argument instead of ``ctx``
+        and returns a JSON-serializable result (or an already serialized
+        string). The handler resolves the client, encodes the result, and turns
+        any exception into an ``{"error": ...}`` response.
+
+        Args:
+            error: Error log prefix; may reference tool arguments by name,
+                e.g. ``"Error updating memory {memory_id}"``.
+
+        Returns:
+            Decorator producing the handler to register with ``server.tool``.
+        """
+
+        def decorate(body: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[str]]:
+            # Memory is only imported for type checking; it can stand in as Any
+            # because the client parameter is dropped from the signature
+            signature = inspect.signature(body, locals={"Memory": Any}, eval_str=True)
+            params = list(signature.parameters.values())[1:]
+            params.append(
+                inspect.Parameter(
+                    "ctx",
+                    inspect.Parameter.POSITIONAL_OR_KEYWORD,
+                    default=None,
+                    annotation=Optional[Context],
+                )
+            )
+
+            @functools.wraps(body)
+            async def tool(*args: Any, ctx: Optional[Context] = None, **kwargs: Any) -> str:
+                try:
+                    result = await body(_get_client(ctx), *args, **kwargs)
+                    return result if isinstance(result, str) else _safe_json(result)
+                except Exception as e:
+                    logger.error(
+                        "%s: %s", error.format_map(kwargs), e,
+                        exc_info=logger.isEnabledFor(logging.DEBUG),
+                    )
+                    return _safe_json({"error": str(e)})
+
+            # FastMCP builds the argument schema and finds the context parameter
+            # from these, so expose the tool arguments without the client
+            tool.__signature__ = signature.replace(parameters=params, return_annotation=str)  # type: ignore[attr-defined]
+            tool.__annotations__ = {p.name: p.annotation for p in params}
+            tool.__annotations__["return"] = str
+            return tool
+
+        return decorate
 
     @server.tool(
         description="Store a new preference, fact, or conversation snippet in long-term memory."
     )
+    @_mem0_tool("Error adding memory")
     async def add_memory(
+        client: Memory,
         text: Annotated[
             str,
             Field(description="Plain sentence summarizing what to store. Required."),
         ],
         messages: Annotated[
-            Optional[List[Dict[str, str]]],
+            Optional[List[ToolMessage]],
             Field(
                 default=None,
                 description="Structured conversation history with 'role'/'content'. Use when you have multiple turns.",
@@ -219,62 +587,77 @@ def create_server() -> FastMCP:
             Optional[Dict[str, Any]],
             Field(default=None, description="Attach arbitrary metadata JSON to the memory."),
         ] = None,
-        ctx: Optional[Context] = None,
-    ) -> str:
+        async_write: Annotated[
+            bool,
+            Field(
+                default=False,
+                description="Return immediately and store the memory in the background. The response has no extraction summary.",
+            ),
+        ] = False,
+        infer: Annotated[
+            bool,
+            Field(
+                default=True,
+                description="Let the LLM extract facts before storing. Set false to store the text verbatim and skip the LLM call.",
+            ),
+        ] = True,
+    ) -> Dict[str, Any]:
         """Write durable information to local storage."""
-        try:
-            client = _get_client(ctx)
-            conversation = (
-                [ToolMessage(**msg).model_dump() for msg in messages]
-                if messages
-                else [{"role": "user", "content": text}]
-            )
-            kwargs = _build_scope_kwargs(user_id, agent_id, run_id)
-            effective_user_id = kwargs["user_id"]
-            if metadata:
-                kwargs["metadata"] = metadata
-            
-            logger.debug(f"Calling mem0.add with conversation: {conversation}")
-            # Run blocking call in thread pool for concurrency support
-            result = await asyncio.to_thread(client.add, conversation, **kwargs)
-            
-            # Analyze the result for debugging
-            _analyze_add_result(result, text, effective_user_id)
-            
-            # Extract summary for better UI/AI consumption
-            summary = []
-            if isinstance(result, dict) and "results" in result:
-                for r in result.get("results", []):
-                    event = r.get("event")
-                    mem_text = r.get("memory") or r.get("text")
-                    if event == "ADD":
-                        summary.append(f"Added: {mem_text}")
-                    elif event == "UPDATE":
-                        summary.append(f"Updated: {mem_text}")
-                    elif event == "DELETE":
-                        summary.append(f"Deleted (obsolete): {mem_text}")
-            
-            if not summary:
-                # Check if it was rejected or already exists
-                if isinstance(result, dict) and any(r.get("event") == "NONE" for r in result.get("results", [])):
-                    summary.append("No changes: Information already exists or was filtered by LLM.")
-                else:
-                    summary.append("No memories were extracted from the input.")
-
-            response_data = {
-                "summary": "\n".join(summary),
-                "details": result,
-                "user_id": effective_user_id
-            }
-            
-            logger.info(
-                f"Memory operation completed for user={effective_user_id}, "
-                f"summary={response_data['summary']}"
+        conversation = (
+            # Already validated by the tool's argument model; just unpack
+            [{"role": msg.role, "content": msg.content} for msg in messages]
+            if messages
+            else [{"role": "user", "content": text}]
+        )
+        kwargs = _build_scope_kwargs(user_id, agent_id, run_id)
+        effective_user_id = kwargs["user_id"]
+        if metadata:
+            kwargs["metadata"] = metadata
+        if not infer:
+            # Mem0 embeds and stores the messages as-is, without extraction
+            kwargs["infer"] = False
+        
+        logger.debug("Calling mem0.add with conversation: %s", conversation)
+        batch_key = None
+        if add_batcher is not None:
+            batch_key = (
+                effective_user_id,
+                agent_id,
+                run_id,
+                json.dumps(metadata, sort_keys=True, default=str) if metadata else None,
+                infer,
             )
-            return _safe_json(response_data)
-        except Exception as e:
-            logger.error(f"Error adding memory: {e}", exc_info=True)
-            return _safe_json({"error": str(e)})
+
+        if async_write:
+            if _write_queue.submit(lambda: _store_memory(client, conversation, kwargs, batch_key)):
+                logger.info("Queued memory write for user=%s", effective_user_id)
+                return {
+                    "status": "queued",
+                    "summary": "Memory write queued; it will be stored in the background.",
+                    "user_id": effective_user_id,
+                }
+            logger.warning("Write queue is full; storing memory synchronously")
+
+        result, batch_size = await _store_memory(client, conversation, kwargs, batch_key)
+        
+        # Summarize the result for better UI/AI consumption
+        summary = _analyze_add_result(result, text, effective_user_id)
+
+        response_data = {
+            "summary": "\n".join(summary),
+            "details": result,
+            "user_id": effective_user_id
+        }
+        if batch_size > 1:
+            # details/summary cover every call merged into this write
+            response_data["batch_size"] = batch_size
+        
+        logger.info(
+            "Memory operation completed for user=%s, summary=%s",
+            effective_user_id,
+            response_data["summary"],
+        )
+        return response_data
 
     @server.tool(
         description="""Semantic search across existing memories. Supports pagination via limit/offset.
@@ -284,7 +667,9 @@ def create_server() -> FastMCP:
         - Avoid complex dict operators like {"project": {"in": [...]}} as they may fail validation.
         """
     )
+    @_mem0_tool("Error searching memories")
     async def search_memories(
+        client: Memory,
         query: Annotated[str, Field(description="Natural language description of what to find.")],
         user_id: Annotated[Optional[str], Field(default=None, description="Filter by user ID.")] = None,
         agent_id: Annotated[Optional[str], Field(default=None, description="Filter by agent ID.")] = None,
@@ -306,220 +691,225 @@ def create_server() -> FastMCP:
         ] = True,
         limit: Annotated[int, Field(default=20, description="Maximum number of results per page. Default 20.")] = 20,
         offset: Annotated[int, Field(default=0, description="Number of results to skip for pagination. Default 0.")] = 0,
-        ctx: Optional[Context] = None,
-    ) -> str:
+    ) -> Any:
         """Semantic search against existing memories with pagination support.
         
         Returns:
             JSON with results, count, offset, limit, and has_more flag.
         """
-        try:
-            client = _get_client(ctx)
-            # Fetch limit + offset + 1 to detect if more results exist
-            fetch_limit = limit + offset + 1
-            kwargs = _build_scope_kwargs(user_id, agent_id, run_id, limit=fetch_limit)
-            if filters:
-                kwargs["filters"] = filters
-            if threshold is not None:
-                kwargs["threshold"] = threshold
-            kwargs["rerank"] = rerank
-
-            # Run blocking call in thread pool for concurrency support
-            result = await asyncio.to_thread(client.search, query, **kwargs)
-            all_memories = _extract_memories(result)
-            
-            # Apply pagination
-            total_available = len(all_memories)
-            paginated = all_memories[offset:offset + limit]
-            has_more = total_available > offset + limit
-            
-            # Extract scores and summarize for the caller
-            summary = []
-            for idx, m in enumerate(paginated):
-                score = m.get("score", "N/A")
-                text = m.get("memory", m.get("text", "N/A"))
-                summary.append(f"[{idx}] (Score: {score}) {text[:100]}...")
-
-            if not summary:
-                summary.append("No relevant memories found.")
-
-            logger.info(
-                f"Search returned {len(paginated)} results (offset={offset}, limit={limit}, "
-                f"has_more={has_more}) for query: {query[:50]}..."
-            )
-            return _safe_json({
-                "results": paginated,
-                "summary": "\n".join(summary),
-                "count": len(paginated),
+        limit = max(0, min(limit, search_max_limit))
+        offset = max(0, offset)
+        if limit == 0:
+            # Nothing to return; skip the executor hop and vector search
+            return {
+                "results": [],
+                "summary": "No relevant memories found.",
+                "count": 0,
                 "offset": offset,
-                "limit": limit,
-                "has_more": has_more,
-            })
-        except Exception as e:
-            logger.error(f"Error searching memories: {e}", exc_info=True)
-            return _safe_json({"error": str(e)})
+                "limit": 0,
+                "has_more": False,
+            }
+
+        # Fetch limit + offset + 1 to detect if more results exist
+        fetch_limit = limit + offset + 1
+        kwargs = _build_scope_kwargs(user_id, agent_id, run_id, limit=fetch_limit)
+        if filters:
+            kwargs["filters"] = filters
+        if threshold is not None:
+            kwargs["threshold"] = threshold
+        kwargs["rerank"] = rerank
+
+        cache_key = (
+            kwargs["user_id"],
+            hashlib.blake2b(
+                json.dumps([query, offset, kwargs], sort_keys=True, default=str).encode(),
+                digest_size=16,
+            ).hexdigest(),
+        )
+        cached = search_cache.get(cache_key)
+        if cached is not None:
+            logger.debug("Search cache hit for query: %.50s...", query)
+            return cached
+
+        return await search_flights.run(
+            (cache_key, cache_generation),
+            lambda: _search_uncached(client, query, offset, limit, kwargs, cache_key),
+        )
 
     @server.tool(
         description="List all memories with optional filters. Supports pagination via limit and offset."
     )
+    @_mem0_tool("Error getting memories")
     async def get_memories(
+        client: Memory,
         user_id: Annotated[Optional[str], Field(default=None, description="Filter by user ID.")] = None,
         agent_id: Annotated[Optional[str], Field(default=None, description="Filter by agent ID.")] = None,
         run_id: Annotated[Optional[str], Field(default=None, description="Filter by run ID.")] = None,
         limit: Annotated[int, Field(default=20, description="Maximum number of results per page. Default 20.")] = 20,
         offset: Annotated[int, Field(default=0, description="Number of results to skip for pagination. Default 0.")] = 0,
-        ctx: Optional[Context] = None,
-    ) -> str:
+    ) -> Dict[str, Any]:
         """List memories via structured filters with pagination support."""
-        try:
-            client = _get_client(ctx)
-            # Fetch limit + offset + 1 to detect if more results exist
-            fetch_limit = limit + offset + 1
-            kwargs = _build_scope_kwargs(user_id, agent_id, run_id, limit=fetch_limit)
-            
-            # Run blocking call in thread pool for concurrency support
-            result = await asyncio.to_thread(client.get_all, **kwargs)
-            all_memories = _extract_memories(result)
-            
-            # Apply pagination
-            total_available = len(all_memories)
-            paginated = all_memories[offset:offset + limit]
-            has_more = total_available > offset + limit
-
-            logger.info(f"Retrieved {len(paginated)} memories for user={kwargs.get('user_id')} (offset={offset}, has_more={has_more})")
-            return _safe_json({
-                "results": paginated, 
-                "count": len(paginated),
-                "offset": offset,
-                "limit": limit,
-                "has_more": has_more
-            })
-        except Exception as e:
-            logger.error(f"Error getting memories: {e}", exc_info=True)
-            return _safe_json({"error": str(e)})
+        # Fetch limit + offset + 1 to detect if more results exist
+        fetch_limit = limit + offset + 1
+        kwargs = _build_scope_kwargs(user_id, agent_id, run_id, limit=fetch_limit)
+        
+        # Run blocking call in the Mem0 executor for concurrency support
+        result = await _run_mem0(client.get_all, **kwargs)
+        all_memories = _extract_memories(result)
+        
+        paginated, has_more = _paginate(all_memories, offset, limit)
+
+        logger.info(
+            "Retrieved %d memories for user=%s (offset=%d, has_more=%s)",
+            len(paginated), kwargs.get("user_id"), offset, has_more,
+        )
+        return {
+            "results": paginated, 
+            "count": len(paginated),
+            "offset": offset,
+            "limit": limit,
+            "has_more": has_more
+        }
+
+    def _memory_id_tool(
+        name: str,
+        method: str,
+        id_description: str,
+        done: str,
+        error: str,
+        writes: bool,
+        cached: bool,
+    ) -> Callable[..., Awaitable[str]]:
+        """Build a tool that calls one Mem0 method with a single memory_id.
 
-    @server.tool(description="Fetch a single memory by its memory_id.")
-    async def get_memory(
-        memory_id: Annotated[str, Field(description="Exact memory_id to fetch.")],
-        ctx: Optional[Context] = None,
-    ) -> str:
-        """Retrieve a single memory once you know its ID."""
-        try:
-            client = _get_client(ctx)
-            # Run blocking call in thread pool for concurrency support
-            result = await asyncio.to_thread(client.get, memory_id)
-            logger.info(f"Retrieved memory: {memory_id}")
-            return _safe_json(result)
-        except Exception as e:
-            logger.error(f"Error getting memory {memory_id}: {e}", exc_info=True)
-            return _safe_json({"error": str(e)})
+        Args:
+            name: Tool name, also used for the argument model.
+            method: Name of the Mem0 ``Memory`` method to call.
+            id_description: Schema description of the memory_id argument.
+            done: Log message prefix on success.
+            error: Error log prefix.
+            writes: Whether the call changes stored memories.
+            cached: Whether responses go through the memory read cache.
+
+        Returns:
+            The tool handler.
+        """
+
+        async def body(client: Memory, memory_id: str) -> Any:
+            if cached:
+                hit = memory_cache.get((method, memory_id))
+                if hit is not None:
+                    logger.debug("Memory cache hit: %s", memory_id)
+                    return hit
+            generation = cache_generation
+            # Run blocking call in the Mem0 executor for concurrency support
+            result = await _run_mem0(getattr(client, method), memory_id)
+            if writes:
+                _invalidate_caches(memory_ids=[memory_id])
+            logger.info("%s: %s", done, memory_id)
+            if cached and result is not None and generation == cache_generation:
+                response = _safe_json(result)
+                memory_cache.set((method, memory_id), response)
+                return response
+            return result
+
+        # Real objects, not strings: the signature is evaluated in module
+        # globals, where id_description is not visible
+        body.__name__ = body.__qualname__ = name
+        body.__annotations__ = {
+            "client": "Memory",
+            "memory_id": Annotated[str, Field(description=id_description)],
+            "return": Any,
+        }
+        return _mem0_tool(error)(body)
+
+    # Tools that take nothing but a memory_id share one implementation:
+    # (tool name, Mem0 method, description, memory_id description, log message,
+    #  error message, writes, cached)
+    memory_id_tools = (
+        ("get_memory", "get", "Fetch a single memory by its memory_id.",
+         "Exact memory_id to fetch.", "Retrieved memory", "Error getting memory {memory_id}",
+         False, True),
+        ("delete_memory", "delete", "Delete a single memory by its memory_id.",
+         "Exact memory_id to delete.", "Deleted memory", "Error deleting memory {memory_id}",
+         True, False),
+        ("get_memory_history", "history", "View change history for a memory.",
+         "Memory ID to get history for.", "History fetched for memory",
+         "Error getting memory history {memory_id}", False, True),
+    )
+    for name, method, description, id_description, done, error, writes, cached in memory_id_tools:
+        server.tool(name=name, description=description)(
+            _memory_id_tool(name, method, id_description, done, error, writes, cached)
+        )
 
     @server.tool(description="Overwrite an existing memory's text.")
+    @_mem0_tool("Error updating memory {memory_id}")
     async def update_memory(
+        client: Memory,
         memory_id: Annotated[str, Field(description="Exact memory_id to overwrite.")],
         text: Annotated[str, Field(description="Replacement text for the memory.")],
-        ctx: Optional[Context] = None,
-    ) -> str:
+    ) -> Any:
         """Overwrite an existing memory's text after confirming the exact memory_id."""
-        try:
-            client = _get_client(ctx)
-            # Run blocking call in thread pool for concurrency support
-            result = await asyncio.to_thread(client.update, memory_id=memory_id, data=text)
-            logger.info(f"Updated memory: {memory_id}")
-            return _safe_json(result)
-        except Exception as e:
-            logger.error(f"Error updating memory {memory_id}: {e}", exc_info=True)
-            return _safe_json({"error": str(e)})
-
-    @server.tool(description="Delete a single memory by its memory_id.")
-    async def delete_memory(
-        memory_id: Annotated[str, Field(description="Exact memory_id to delete.")],
-        ctx: Optional[Context] = None,
-    ) -> str:
-        """Delete a single memory."""
-        try:
-            client = _get_client(ctx)
-            # Run blocking call in thread pool for concurrency support
-            result = await asyncio.to_thread(client.delete, memory_id=memory_id)
-            logger.info(f"Deleted memory: {memory_id}")
-            return _safe_json(result)
-        except Exception as e:
-            logger.error(f"Error deleting memory {memory_id}: {e}", exc_info=True)
-            return _safe_json({"error": str(e)})
+        # Run blocking call in the Mem0 executor for concurrency support
+        result = await _run_mem0(client.update, memory_id=memory_id, data=text)
+        _invalidate_caches(memory_ids=[memory_id])
+        logger.info("Updated memory: %s", memory_id)
+        return result
 
     @server.tool(
         description="Bulk delete memories by scope (user, agent, or run). This implementation is safe and only deletes memories within the specified scope."
     )
+    @_mem0_tool("Error in safe bulk delete")
     async def delete_all_memories(
+        client: Memory,
         user_id: Annotated[Optional[str], Field(default=None, description="User scope to delete.")] = None,
         agent_id: Annotated[Optional[str], Field(default=None, description="Agent scope to delete.")] = None,
         run_id: Annotated[Optional[str], Field(default=None, description="Run scope to delete.")] = None,
-        ctx: Optional[Context] = None,
-    ) -> str:
+    ) -> Dict[str, Any]:
         """Delete multiple memories by scope safely.
         
         To prevent the known bug in mem0 where delete_all(filters) wipes the entire store,
         this tool fetches IDs first and deletes them one-by-one.
         """
+        # 1. Fetch all memories for the given scope
+        kwargs = _build_scope_kwargs(user_id, agent_id, run_id)
+        logger.info("Safe bulk delete requested for scope: %s", kwargs)
+        
+        # Run blocking call in the Mem0 executor
+        get_res = await _run_mem0(client.get_all, **kwargs)
+        memories = _extract_memories(get_res)
+        
+        if not memories:
+            logger.info("No memories found in the specified scope to delete.")
+            return {"message": "No memories found in the specified scope.", "deleted_count": 0}
+        
+        # 2. Delete each memory individually to ensure safety, in one
+        # executor hop rather than one thread handoff per memory
+        memory_ids = [mem_id for mem in memories if (mem_id := mem.get("id"))]
         try:
-            client = _get_client(ctx)
-            # 1. Fetch all memories for the given scope
-            kwargs = _build_scope_kwargs(user_id, agent_id, run_id)
-            logger.info(f"Safe bulk delete requested for scope: {kwargs}")
-            
-            # Use to_thread for blocking call
-            get_res = await asyncio.to_thread(client.get_all, **kwargs)
-            memories = _extract_memories(get_res)
-            
-            if not memories:
-                logger.info("No memories found in the specified scope to delete.")
-                return _safe_json({"message": "No memories found in the specified scope.", "deleted_count": 0})
-            
-            # 2. Delete each memory individually to ensure safety
-            deleted_count = 0
-            for mem in memories:
-                mem_id = mem.get("id")
-                if mem_id:
-                    await asyncio.to_thread(client.delete, mem_id)
-                    deleted_count += 1
-            
-            logger.info(f"Successfully deleted {deleted_count} memories safely.")
-            return _safe_json({
-                "message": f"Successfully deleted {deleted_count} memories.",
-                "deleted_count": deleted_count
-            })
-        except Exception as e:
-            logger.error(f"Error in safe bulk delete: {e}", exc_info=True)
-            return _safe_json({"error": str(e)})
-
-    @server.tool(description="View change history for a memory.")
-    async def get_memory_history(
-        memory_id: Annotated[str, Field(description="Memory ID to get history for.")],
-        ctx: Optional[Context] = None,
-    ) -> str:
-        """Get change history for a memory."""
-        try:
-            client = _get_client(ctx)
-            # Run blocking call in thread pool for concurrency support
-            result = await asyncio.to_thread(client.get_history, memory_id=memory_id)
-            logger.info(f"History fetched for memory: {memory_id}")
-            return _safe_json(result)
-        except Exception as e:
-            logger.error(f"Error getting memory history {memory_id}: {e}", exc_info=True)
-            return _safe_json({"error": str(e)})
+            deleted_count = await _run_mem0(_delete_memories, client.delete, memory_ids)
+        finally:
+            _invalidate_caches(kwargs["user_id"], memory_ids)
+        
+        logger.info("Successfully deleted %d memories safely.", deleted_count)
+        return {
+            "message": f"Successfully deleted {deleted_count} memories.",
+            "deleted_count": deleted_count
+        }
 
     @server.tool(description="Reset all memories. Use with caution!")
-    async def reset_memories(ctx: Optional[Context] = None) -> str:
+    @_mem0_tool("Error resetting memories")
+    async def reset_memories(client: Memory) -> Any:
         """Reset all stored memories."""
-        try:
-            client = _get_client(ctx)
-            # Run blocking call in thread pool for concurrency support
-            result = await asyncio.to_thread(client.reset)
-            logger.warning("All memories have been reset")
-            return _safe_json(result)
-        except Exception as e:
-            logger.error(f"Error resetting memories: {e}", exc_info=True)
-            return _safe_json({"error": str(e)})
+        # Run blocking call in the Mem0 executor for concurrency support
+        result = await _run_mem0(client.reset)
+        # reset() rebuilds the vector store (and, depending on the Mem0
+        # version, other components), dropping the wrappers and collection
+        # settings applied at startup
+        await _run_mem0(tune_mem0_client, client)
+        _invalidate_caches()
+        logger.warning("All memories have been reset")
+        return result
 
     @server.prompt()
     def memory_assistant() -> str:
@@ -553,28 +943,57 @@ Tips:
     return server
 
 
+async def _warm_up_mem0() -> None:
+    """Create the Mem0 client and run one embedding so the first request starts warm."""
+    try:
+        client = await _get_or_create_mem0_client()
+        await _run_mem0(client.embedding_model.embed, "warmup", "search")
+        logger.info("Mem0 client warmed up")
+    except Exception as e:
+        logger.warning("Mem0 warm-up failed: %s", e)
+
+
 async def run_async():
     """Run the MCP server asynchronously."""
     server = create_server()
-    transport = os.getenv("TRANSPORT", "sse")
+    transport = _TRANSPORT
 
-    logger.info(f"Starting AI Memory MCP server (transport={transport}, user={DEFAULT_USER_ID})")
+    logger.info("Starting AI Memory MCP server (transport=%s, user=%s)", transport, DEFAULT_USER_ID)
 
-    if transport == "streamable-http":
-        # Streamable HTTP: stateless, better reconnection handling
-        # Default path is /mcp
-        await server.run_streamable_http_async()
-    elif transport == "sse":
-        # Legacy SSE mode (deprecated in MCP spec 2025-03-26)
-        await server.run_sse_async()
-    else:
-        await server.run_stdio_async()
+    # Build the client and open the embedder connection while the transport
+    # starts, instead of on the first session
+    warm_up = asyncio.create_task(_warm_up_mem0()) if get_env_bool("MEM0_WARMUP", False) else None
+
+    try:
+        if transport == "streamable-http":
+            # Streamable HTTP: stateless, better reconnection handling
+            # Default path is /mcp
+            await server.run_streamable_http_async()
+        elif transport == "sse":
+            # Legacy SSE mode (deprecated in MCP spec 2025-03-26)
+            await server.run_sse_async()
+        else:
+            await server.run_stdio_async()
+    finally:
+        if warm_up is not None:
+            warm_up.cancel()
+        if len(_write_queue):
+            logger.info("Flushing %d queued memory writes before exit", len(_write_queue))
+        await _write_queue.drain()
 
 
 def main() -> None:
-    """Run the MCP server."""
+    """Run the MCP server, on uvloop when it is installed."""
+    try:
+        import uvloop
+    except ImportError:
+        run = asyncio.run
+    else:
+        run = uvloop.run
+        logger.info("Using uvloop event loop")
+
     try:
-        asyncio.run(run_async())
+        run(run_async())
     except KeyboardInterrupt:
         logger.info("Server stopped by user")
 
@@ -10,6 +10,7 @@
 
 import asyncio
 import httpx
+import io
 import json
 import sys
 from pathlib import Path
@@ -25,162 +26,160 @@ def get_env(key: str, default=None):
     return os.getenv(key, default)
 
 
-async def test_api_connection(base_url: str, api_key: str, provider: str):
-    """Test API connection with a simple request."""
-    print(f"\n{'='*60}")
-    print(f"测试 {provider} API 连接")
-    print(f"{'='*60}")
-    print(f"端点: {base_url}")
-    print(f"密钥: {api_key[:10]}...") if api_key else print("密钥: 未配置")
+async def test_api_connection(client: httpx.AsyncClient, base_url: str, api_key: str, provider: str, out: io.StringIO):
+    """Test API connection with a simple request, writing the report to ``out``."""
+    print(f"\n{'='*60}", file=out)
+    print(f"测试 {provider} API 连接", file=out)
+    print(f"{'='*60}", file=out)
+    print(f"端点: {base_url}", file=out)
+    print(f"密钥: {api_key[:10]}...", file=out) if api_key else print("密钥: 未配置", file=out)
     
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            # 尝试一个简单的请求
-            headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
-            
-            if "openai" in base_url.lower() or "vectorengine" in base_url.lower() or "legoutech" in base_url.lower():
-                # OpenAI 兼容 API
-                print("\n💭 尝试调用 OpenAI 兼容 API...")
-                model = get_env("LLM_MODEL", "gpt-4o-mini")
-                print(f"   使用模型: {model}")
-                payload = {
-                    "model": model,
-                    "messages": [{"role": "user", "content": "测试"}],
-                    "max_tokens": 10,
-                }
-                
-                try:
-                    print(f"   发送请求到: {base_url}/chat/completions")
-                    response = await client.post(
-                        f"{base_url}/chat/completions",
-                        headers=headers,
-                        json=payload,
-                        timeout=15.0,
-                    )
-                    
-                    print(f"   状态码: {response.status_code}")
-                    
-                    if response.status_code == 200:
-                        print("   ✅ API 连接成功！")
-                        data = response.json()
-                        print(f"   响应: {json.dumps(data, ensure_ascii=False)[:150]}...")
-                        return True
-                    elif response.status_code == 401:
-                        print("   ❌ 认证失败 (401)")
-                        print("   💡 请检查 API_KEY 是否正确")
-                        print(f"   响应: {response.text[:300]}")
-                        return False
-                    elif response.status_code == 403:
-                        print("   ❌ 无权限 (403)")
-                        print("   💡 API_KEY 可能没有权限访问此模型")
-                        print(f"   响应: {response.text[:300]}")
-                        return False
-                    elif response.status_code == 404:
-                        print("   ❌ 模型未找到 (404)")
-                        print(f"   💡 模型 '{model}' 在此 API 上不可用")
-                        print(f"   响应: {response.text[:300]}")
-                        return False
-                    elif response.status_code == 429:
-                        print("   ⚠️ 速率限制 (429)")
-                        print("   💡 API 调用频率过高，请稍后重试")
-                        return False
-                    elif response.status_code >= 500:
-                        print(f"   ⚠️ 服务器错误 ({response.status_code})")
-                        print("   💡 API 服务可能暂时不可用")
-                        print(f"   响应: {response.text[:300]}")
-                        return False
-                    else:
-                        print(f"   ⚠️ 未预期的状态码: {response.status_code}")
-                        print(f"   响应: {response.text[:300]}")
-                        return False
-                        
-                except httpx.TimeoutException:
-                    print(f"   ❌ 请求超时")
-                    print("   💡 API 响应太慢，可能是网络问题或服务器过载")
-                    return False
-                except httpx.RequestError as e:
-                    print(f"   ❌ 请求失败: {type(e).__name__}: {e}")
-                    print("   💡 可能的原因:")
-                    print("      - 网络连接问题")
-                    print("      - DNS 解析失败")
-                    print("      - 防火墙/代理问题")
-                    return False
-                    
-    except Exception as e:
-        print(f"   ❌ 测试失败: {e}")
-        return False
-
-
-async def test_embedding_api():
-    """Test Embedding API connection."""
-    embedding_base_url = get_env("EMBEDDING_BASE_URL") or get_env("LLM_BASE_URL")
-    embedding_api_key = get_env("EMBEDDING_API_KEY") or get_env("LLM_API_KEY")
-    embedding_model = get_env("EMBEDDING_MODEL", "text-embedding-3-small")
-    embedding_provider = get_env("EMBEDDING_PROVIDER", "openai")
-    
-    print(f"\n{'='*60}")
-    print(f"测试 {embedding_provider} Embedding API 连接")
-    print(f"{'='*60}")
-    print(f"端点: {embedding_base_url}")
-    print(f"模型: {embedding_model}")
-    print(f"密钥: {embedding_api_key[:10]}...") if embedding_api_key else print("密钥: 未配置")
-    
-    try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            headers = {"Authorization": f"Bearer {embedding_api_key}"} if embedding_api_key else {}
-            
-            print("\n💭 尝试调用 Embedding API...")
+        # 尝试一个简单的请求
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        
+        if "openai" in base_url.lower() or "vectorengine" in base_url.lower() or "legoutech" in base_url.lower():
+            # OpenAI 兼容 API
+            print("\n💭 尝试调用 OpenAI 兼容 API...", file=out)
+            model = get_env("LLM_MODEL", "gpt-4o-mini")
+            print(f"   使用模型: {model}", file=out)
             payload = {
-                "model": embedding_model,
-                "input": "测试文本",
+                "model": model,
+                "messages": [{"role": "user", "content": "测试"}],
+                "max_tokens": 10,
             }
             
             try:
+                print(f"   发送请求到: {base_url}/chat/completions", file=out)
                 response = await client.post(
-                    f"{embedding_base_url}/embeddings",
+                    f"{base_url}/chat/completions",
                     headers=headers,
                     json=payload,
+                    timeout=15.0,
                 )
                 
-                print(f"   状态码: {response.status_code}")
+                print(f"   状态码: {response.status_code}", file=out)
                 
                 if response.status_code == 200:
-                    print("   ✅ Embedding API 连接成功！")
+                    print("   ✅ API 连接成功！", file=out)
                     data = response.json()
-                    print(f"   响应摘要: 返回 {len(data.get('data', []))} 个 embedding")
+                    print(f"   响应: {json.dumps(data, ensure_ascii=False)[:150]}...", file=out)
                     return True
                 elif response.status_code == 401:
-                    print("   ❌ 认证失败 (401)")
-                    print("   💡 请检查 EMBEDDING_API_KEY 是否正确")
+                    print("   ❌ 认证失败 (401)", file=out)
+                    print("   💡 请检查 API_KEY 是否正确", file=out)
+                    print(f"   响应: {response.text[:300]}", file=out)
                     return False
                 elif response.status_code == 403:
-                    print("   ❌ 无权限 (403)")
+                    print("   ❌ 无权限 (403)", file=out)
+                    print("   💡 API_KEY 可能没有权限访问此模型", file=out)
+                    print(f"   响应: {response.text[:300]}", file=out)
+                    return False
+                elif response.status_code == 404:
+                    print("   ❌ 模型未找到 (404)", file=out)
+                    print(f"   💡 模型 '{model}' 在此 API 上不可用", file=out)
+                    print(f"   响应: {response.text[:300]}", file=out)
                     return False
                 elif response.status_code == 429:
-                    print("   ⚠️ 速率限制 (429)")
+                    print("   ⚠️ 速率限制 (429)", file=out)
+                    print("   💡 API 调用频率过高，请稍后重试", file=out)
                     return False
                 elif response.status_code >= 500:
-                    print(f"   ⚠️ 服务器错误 ({response.status_code})")
+                    print(f"   ⚠️ 服务器错误 ({response.status_code})", file=out)
+                    print("   💡 API 服务可能暂时不可用", file=out)
+                    print(f"   响应: {response.text[:300]}", file=out)
                     return False
                 else:
-                    print(f"   ⚠️ 未预期的状态码: {response.status_code}")
-                    print(f"   响应: {response.text[:200]}")
+                    print(f"   ⚠️ 未预期的状态码: {response.status_code}", file=out)
+                    print(f"   响应: {response.text[:300]}", file=out)
                     return False
                     
+            except httpx.TimeoutException:
+                print("   ❌ 请求超时", file=out)
+                print("   💡 API 响应太慢，可能是网络问题或服务器过载", file=out)
+                return False
             except httpx.RequestError as e:
-                print(f"   ❌ 请求失败: {e}")
+                print(f"   ❌ 请求失败: {type(e).__name__}: {e}", file=out)
+                print("   💡 可能的原因:", file=out)
+                print("      - 网络连接问题", file=out)
+                print("      - DNS 解析失败", file=out)
+                print("      - 防火墙/代理问题", file=out)
                 return False
                 
     except Exception as e:
-        print(f"   ❌ 测试失败: {e}")
+        print(f"   ❌ 测试失败: {e}", file=out)
         return False
 
 
-async def test_network():
-    """Test basic network connectivity."""
-    print(f"\n{'='*60}")
-    print("测试网络连接")
-    print(f"{'='*60}")
+async def test_embedding_api(client: httpx.AsyncClient, out: io.StringIO):
+    """Test Embedding API connection, writing the report to ``out``."""
+    embedding_base_url = get_env("EMBEDDING_BASE_URL") or get_env("LLM_BASE_URL")
+    embedding_api_key = get_env("EMBEDDING_API_KEY") or get_env("LLM_API_KEY")
+    embedding_model = get_env("EMBEDDING_MODEL", "text-embedding-3-small")
+    embedding_provider = get_env("EMBEDDING_PROVIDER", "openai")
+    
+    print(f"\n{'='*60}", file=out)
+    print(f"测试 {embedding_provider} Embedding API 连接", file=out)
+    print(f"{'='*60}", file=out)
+    print(f"端点: {embedding_base_url}", file=out)
+    print(f"模型: {embedding_model}", file=out)
+    print(f"密钥: {embedding_api_key[:10]}...", file=out) if embedding_api_key else print("密钥: 未配置", file=out)
+    
+    try:
+        headers = {"Authorization": f"Bearer {embedding_api_key}"} if embedding_api_key else {}
+        
+        print("\n💭 尝试调用 Embedding API...", file=out)
+        payload = {
+            "model": embedding_model,
+            "input": "测试文本",
+        }
+        
+        try:
+            response = await client.post(
+                f"{embedding_base_url}/embeddings",
+                headers=headers,
+                json=payload,
+            )
+            
+            print(f"   状态码: {response.status_code}", file=out)
+            
+            if response.status_code == 200:
+                print("   ✅ Embedding API 连接成功！", file=out)
+                data = response.json()
+                print(f"   响应摘要: 返回 {len(data.get('data', []))} 个 embedding", file=out)
+                return True
+            elif response.status_code == 401:
+                print("   ❌ 认证失败 (401)", file=out)
+                print("   💡 请检查 EMBEDDING_API_KEY 是否正确", file=out)
+                return False
+            elif response.status_code == 403:
+                print("   ❌ 无权限 (403)", file=out)
+                return False
+            elif response.status_code == 429:
+                print("   ⚠️ 速率限制 (429)", file=out)
+                return False
+            elif response.status_code >= 500:
+                print(f"   ⚠️ 服务器错误 ({response.status_code})", file=out)
+                return False
+            else:
+                print(f"   ⚠️ 未预期的状态码: {response.status_code}", file=out)
+                print(f"   响应: {response.text[:200]}", file=out)
+                return False
+                
+        except httpx.RequestError as e:
+            print(f"   ❌ 请求失败: {e}", file=out)
+            return False
+            
+    except Exception as e:
+        print(f"   ❌ 测试失败: {e}", file=out)
+        return False
+
+
+async def test_network(out: io.StringIO):
+    """Test basic network connectivity, writing the report to ``out``."""
+    print(f"\n{'='*60}", file=out)
+    print("测试网络连接", file=out)
+    print(f"{'='*60}", file=out)
     
     common_urls = [
         ("Google DNS", "https://8.8.8.8"),
@@ -188,34 +187,55 @@ async def test_network():
         ("Legotech API", "https://chat.legoutech.cn"),
     ]
     
-    for name, url in common_urls:
+    async def probe(client: httpx.AsyncClient, url: str):
         try:
-            async with httpx.AsyncClient(timeout=5.0, verify=False) as client:
-                response = await client.head(url)
-                print(f"✅ {name}: 可达 ({response.status_code})")
+            return await client.head(url)
         except Exception as e:
-            print(f"❌ {name}: 不可达 ({type(e).__name__})")
+            return e
+
+    # 三个探测共用一个客户端并发执行，耗时取决于最慢的一个
+    async with httpx.AsyncClient(timeout=5.0, verify=False) as client:
+        results = await asyncio.gather(*(probe(client, url) for _, url in common_urls))
+
+    for (name, _), result in zip(common_urls, results):
+        if isinstance(result, Exception):
+            print(f"❌ {name}: 不可达 ({type(result).__name__})", file=out)
+        else:
+            print(f"✅ {name}: 可达 ({result.status_code})", file=out)
 
 
 async def main():
     """Main diagnostic function."""
     print("\n🔍 开始诊断 API 连接问题...\n")
     
-    # 测试网络
-    await test_network()
-    
-    # 测试 LLM API
     llm_provider = get_env("LLM_PROVIDER", "openai")
     llm_base_url = get_env("LLM_BASE_URL")
     llm_api_key = get_env("LLM_API_KEY")
+    llm_ok = False
     
+    # 各项检测并发执行，报告各自写入缓冲区，结束后按网络、LLM、Embedding 的顺序输出
+    print("⏳ 正在执行各项检测...")
+    network_out, llm_out, embedding_out = io.StringIO(), io.StringIO(), io.StringIO()
+    # LLM 与 Embedding 通常是同一主机，共用一个客户端以复用连接
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        checks = [test_network(network_out), test_embedding_api(client, embedding_out)]
+        if llm_base_url:
+            checks.insert(1, test_api_connection(client, llm_base_url, llm_api_key, f"{llm_provider} LLM", llm_out))
+        # 某项检测抛出异常时，其余检测的报告照常输出
+        results = await asyncio.gather(*checks, return_exceptions=True)
+
+    def report(out: io.StringIO, result) -> bool:
+        print(out.getvalue(), end="")
+        if isinstance(result, BaseException):
+            print(f"   ❌ 检测异常: {type(result).__name__}: {result}")
+        return result is True
+
+    report(network_out, results[0])
     if not llm_base_url:
         print("\n⚠️ 未配置 LLM_BASE_URL")
     else:
-        llm_ok = await test_api_connection(llm_base_url, llm_api_key, f"{llm_provider} LLM")
-    
-    # 测试 Embedding API
-    embedding_ok = await test_embedding_api()
+        llm_ok = report(llm_out, results[1])
+    embedding_ok = report(embedding_out, results[-1])
     
     # 总结
     print(f"\n{'='*60}")
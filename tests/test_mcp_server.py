@@ -17,21 +17,41 @@
 参数:
     --url: MCP 服务器 URL，默认 http://localhost:8050
     --skip-api: 跳过需要 LLM/Embedding API 调用的测试
+    --concurrency: 并发调用工具的最大数量，默认 16
 """
 
 import argparse
 import asyncio
-import json
+import re
 import sys
 import uuid
 from typing import Any, Dict, Optional
 
+import orjson
 from mcp import ClientSession
 from mcp.client.streamable_http import streamable_http_client
 
 
 # API 调用失败的错误关键词
 API_ERROR_KEYWORDS = ["Connection error", "timeout", "rate limit", "API", "401", "403", "500"]
+_API_ERROR_RE = re.compile("|".join(map(re.escape, API_ERROR_KEYWORDS)), re.IGNORECASE)
+
+
+def preview(obj: Any, limit: int, indent: bool = False) -> str:
+    """把结果序列化为截断后的预览文本。
+
+    各层列表先截到前 3 项再序列化，耗时不随返回的记忆条数增长。
+    """
+    def shrink(value: Any) -> Any:
+        if isinstance(value, list):
+            return [shrink(item) for item in value[:3]]
+        if isinstance(value, dict):
+            return {key: shrink(item) for key, item in value.items()}
+        return value
+
+    obj = shrink(obj)
+    option = orjson.OPT_INDENT_2 if indent else 0
+    return orjson.dumps(obj, option=option).decode()[:limit]
 
 
 def is_api_error(result: Optional[Dict]) -> bool:
@@ -40,16 +60,17 @@ def is_api_error(result: Optional[Dict]) -> bool:
         return False
     error = result.get("error", "")
     if isinstance(error, str):
-        return any(kw.lower() in error.lower() for kw in API_ERROR_KEYWORDS)
+        return _API_ERROR_RE.search(error) is not None
     return False
 
 
-async def test_mcp_server(base_url: str, skip_api: bool = False):
+async def test_mcp_server(base_url: str, skip_api: bool = False, concurrency: int = 16):
     """使用 MCP SDK 测试服务器功能。
     
     Args:
         base_url: MCP 服务器地址
         skip_api: 是否跳过需要 LLM/Embedding API 的测试
+        concurrency: 并发调用工具的最大数量
     """
     
     print("\n" + "=" * 60)
@@ -87,16 +108,20 @@ async def test_mcp_server(base_url: str, skip_api: bool = False):
                 for tool in tools:
                     print(f"   • {tool.name}: {tool.description[:50]}...")
                 
+                # 限制并发的工具调用数量，避免批量添加/清理时压垮服务器
+                call_limit = asyncio.Semaphore(max(1, concurrency))
+
                 # 辅助函数：调用工具并解析结果
                 async def call_tool(name: str, arguments: Dict[str, Any]) -> Optional[Dict]:
                     nonlocal all_passed
                     try:
-                        result = await session.call_tool(name, arguments=arguments)
+                        async with call_limit:
+                            result = await session.call_tool(name, arguments=arguments)
                         if result.content and len(result.content) > 0:
                             text = result.content[0].text
                             try:
-                                return json.loads(text)
-                            except json.JSONDecodeError:
+                                return orjson.loads(text)
+                            except orjson.JSONDecodeError:
                                 return {"raw": text}
                         return None
                     except Exception as e:
@@ -126,7 +151,7 @@ async def test_mcp_server(base_url: str, skip_api: bool = False):
                     
                     if result and "error" not in result:
                         print(f"   ✅ 添加成功")
-                        print(f"   结果: {json.dumps(result, ensure_ascii=False, indent=2)[:300]}...")
+                        print(f"   结果: {preview(result, 300, indent=True)}...")
                         # 尝试从结果中获取 memory_id
                         if isinstance(result, dict):
                             if "results" in result and len(result["results"]) > 0:
@@ -153,12 +178,16 @@ async def test_mcp_server(base_url: str, skip_api: bool = False):
                             "我喜欢喝咖啡，尤其是拿铁",
                         ]
                         
-                        for text in test_memories:
-                            result = await call_tool("add_memory", {
+                        # 并发发送，总耗时约为最慢的一次调用而不是所有调用之和
+                        results = await asyncio.gather(*(
+                            call_tool("add_memory", {
                                 "text": text,
                                 "user_id": test_user_id,
                                 "agent_id": test_agent_id,
                             })
+                            for text in test_memories
+                        ))
+                        for text, result in zip(test_memories, results):
                             if result and "error" not in result:
                                 print(f"   ✅ 已添加: {text[:30]}...")
                             elif is_api_error(result):
@@ -166,15 +195,31 @@ async def test_mcp_server(base_url: str, skip_api: bool = False):
                             else:
                                 print(f"   ❌ 添加失败: {text[:30]}...")
 
+                # 测试 2、3、4 只读且互不依赖，先并发发出请求，再按顺序输出结果
+                get_memories_task = asyncio.create_task(call_tool("get_memories", {
+                    "user_id": test_user_id,
+                    "agent_id": test_agent_id,
+                }))
+                search_task = None
+                if not (skip_api or not api_available):
+                    search_task = asyncio.create_task(call_tool("search_memories", {
+                        "query": "编程语言和开发框架",
+                        "user_id": test_user_id,
+                        "limit": 5,
+                        "offset": 0,
+                    }))
+                get_memory_task = None
+                if memory_id:
+                    get_memory_task = asyncio.create_task(call_tool("get_memory", {
+                        "memory_id": memory_id,
+                    }))
+
                 # 测试 2: 获取所有记忆
                 print("\n" + "-" * 40)
                 print("📋 测试 2: 获取所有记忆 (get_memories)")
                 print("-" * 40)
                 
-                result = await call_tool("get_memories", {
-                    "user_id": test_user_id,
-                    "agent_id": test_agent_id,
-                })
+                result = await get_memories_task
                 
                 if result and "error" not in result:
                     count = result.get("count", 0)
@@ -204,12 +249,7 @@ async def test_mcp_server(base_url: str, skip_api: bool = False):
                     print("🔍 测试 3: 语义搜索记忆 (search_memories)")
                     print("-" * 40)
                     
-                    result = await call_tool("search_memories", {
-                        "query": "编程语言和开发框架",
-                        "user_id": test_user_id,
-                        "limit": 5,
-                        "offset": 0,
-                    })
+                    result = await search_task
                     
                     if result and "error" not in result:
                         count = result.get("count", 0)
@@ -251,9 +291,10 @@ async def test_mcp_server(base_url: str, skip_api: bool = False):
                     print("📄 测试 4: 获取单个记忆 (get_memory)")
                     print("-" * 40)
                     
-                    result = await call_tool("get_memory", {
+                    # memory_id 来自测试 2 时还没有预先发出的请求
+                    result = await (get_memory_task or call_tool("get_memory", {
                         "memory_id": memory_id,
-                    })
+                    }))
                     
                     if result and "error" not in result:
                         print(f"   ✅ 获取成功")
@@ -287,7 +328,7 @@ async def test_mcp_server(base_url: str, skip_api: bool = False):
                         
                         if result and "error" not in result:
                             print(f"   ✅ 更新成功")
-                            print(f"   结果: {json.dumps(result, ensure_ascii=False)[:150]}...")
+                            print(f"   结果: {preview(result, 150)}...")
                         elif is_api_error(result):
                             print(f"   ⚠️ API 连接失败: {result.get('error', '')}")
                         else:
@@ -313,10 +354,10 @@ async def test_mcp_server(base_url: str, skip_api: bool = False):
                         if isinstance(result, list):
                             print(f"   ✅ 获取成功，共 {len(result)} 条历史记录")
                             for i, hist in enumerate(result[:2]):
-                                print(f"   {i+1}. {json.dumps(hist, ensure_ascii=False)[:80]}...")
+                                print(f"   {i+1}. {preview(hist, 80)}...")
                         else:
                             print(f"   ✅ 获取成功")
-                            print(f"   结果: {json.dumps(result, ensure_ascii=False)[:150]}...")
+                            print(f"   结果: {preview(result, 150)}...")
                     else:
                         print("   ⚠️ 获取历史可能不支持或无历史记录")
                 else:
@@ -361,15 +402,12 @@ async def test_mcp_server(base_url: str, skip_api: bool = False):
                 
                 if result and "error" not in result:
                     memories = result.get("results", [])
-                    deleted_count = 0
-                    for mem in memories:
-                        mem_id = mem.get("id")
-                        if mem_id:
-                            del_result = await call_tool("delete_memory", {
-                                "memory_id": mem_id,
-                            })
-                            if del_result and "error" not in del_result:
-                                deleted_count += 1
+                    del_results = await asyncio.gather(*(
+                        call_tool("delete_memory", {"memory_id": mem["id"]})
+                        for mem in memories
+                        if mem.get("id")
+                    ))
+                    deleted_count = sum(1 for r in del_results if r and "error" not in r)
                     print(f"   ✅ 已删除 {deleted_count}/{len(memories)} 条测试记忆")
                 else:
                     print(f"   ⚠️ 获取记忆列表失败: {result}")
@@ -391,7 +429,7 @@ async def test_mcp_server(base_url: str, skip_api: bool = False):
     except ConnectionRefusedError:
         print(f"❌ 无法连接到服务器 {base_url}")
         print("   请确保 MCP 服务器正在运行:")
-        print("   TRANSPORT=sse uv run python -m mcp_ai_memory.server")
+        print("   TRANSPORT=streamable-http uv run python -m mcp_ai_memory.server")
         return False
     except Exception as e:
         print(f"❌ 测试过程中发生错误: {e}")
@@ -436,68 +474,82 @@ async def simple_connectivity_test(base_url: str) -> bool:
     except ConnectionRefusedError:
         print(f"❌ 无法连接到 {base_url}")
         print("   请确保 MCP 服务器正在运行:")
-        print("   TRANSPORT=sse uv run python -m mcp_ai_memory.server")
+        print("   TRANSPORT=streamable-http uv run python -m mcp_ai_memory.server")
         return False
     except Exception as e:
         print(f"❌ 连接测试失败: {e}")
         return False
 
 
-async def list_available_tools(base_url: str):
+async def list_available_tools(session: ClientSession):
     """列出所有可用的 MCP 工具。"""
     print("\n📋 获取可用工具列表...")
     
     try:
-        async with streamable_http_client(f"{base_url}/mcp") as (read_stream, write_stream, _):
-            async with ClientSession(read_stream, write_stream) as session:
-                await session.initialize()
-                
-                tools_result = await session.list_tools()
-                tools = tools_result.tools
-                
-                print(f"\n✅ 找到 {len(tools)} 个可用工具:\n")
-                for tool in tools:
-                    print(f"  • {tool.name}")
-                    print(f"    描述: {tool.description}")
-                    if tool.inputSchema:
-                        props = tool.inputSchema.get("properties", {})
-                        required = tool.inputSchema.get("required", [])
-                        if props:
-                            print(f"    参数:")
-                            for prop_name, prop_info in props.items():
-                                req_mark = "*" if prop_name in required else ""
-                                prop_desc = prop_info.get("description", "")[:40]
-                                prop_type = prop_info.get("type", "any")
-                                print(f"      - {prop_name}{req_mark} ({prop_type}): {prop_desc}...")
-                    print()
-                    
+        tools_result = await session.list_tools()
+        tools = tools_result.tools
+        
+        print(f"\n✅ 找到 {len(tools)} 个可用工具:\n")
+        for tool in tools:
+            print(f"  • {tool.name}")
+            print(f"    描述: {tool.description}")
+            if tool.inputSchema:
+                props = tool.inputSchema.get("properties", {})
+                required = tool.inputSchema.get("required", [])
+                if props:
+                    print(f"    参数:")
+                    for prop_name, prop_info in props.items():
+                        req_mark = "*" if prop_name in required else ""
+                        prop_desc = prop_info.get("description", "")[:40]
+                        prop_type = prop_info.get("type", "any")
+                        print(f"      - {prop_name}{req_mark} ({prop_type}): {prop_desc}...")
+            print()
+            
     except Exception as e:
         print(f"❌ 获取工具列表失败: {e}")
 
 
-async def list_prompts(base_url: str):
+async def list_prompts(session: ClientSession):
     """列出所有可用的 prompts。"""
     print("\n📝 获取可用 prompts...")
     
+    try:
+        prompts_result = await session.list_prompts()
+        prompts = prompts_result.prompts
+        
+        if prompts:
+            print(f"\n✅ 找到 {len(prompts)} 个可用 prompt:\n")
+            for prompt in prompts:
+                print(f"  • {prompt.name}")
+                if prompt.description:
+                    print(f"    描述: {prompt.description}")
+        else:
+            print("   没有可用的 prompts")
+            
+    except Exception as e:
+        print(f"❌ 获取 prompts 失败: {e}")
+
+
+async def list_all(base_url: str) -> bool:
+    """在同一个会话中检查连接性并列出工具和 prompts。"""
+    print("\n📡 检查服务器连接性...")
+    
     try:
         async with streamable_http_client(f"{base_url}/mcp") as (read_stream, write_stream, _):
             async with ClientSession(read_stream, write_stream) as session:
                 await session.initialize()
-                
-                prompts_result = await session.list_prompts()
-                prompts = prompts_result.prompts
-                
-                if prompts:
-                    print(f"\n✅ 找到 {len(prompts)} 个可用 prompt:\n")
-                    for prompt in prompts:
-                        print(f"  • {prompt.name}")
-                        if prompt.description:
-                            print(f"    描述: {prompt.description}")
-                else:
-                    print("   没有可用的 prompts")
-                    
+                print(f"✅ MCP 服务器连接正常 ({base_url})")
+                await list_available_tools(session)
+                await list_prompts(session)
+                return True
+    except ConnectionRefusedError:
+        print(f"❌ 无法连接到 {base_url}")
+        print("   请确保 MCP 服务器正在运行:")
+        print("   TRANSPORT=streamable-http uv run python -m mcp_ai_memory.server")
+        return False
     except Exception as e:
-        print(f"❌ 获取 prompts 失败: {e}")
+        print(f"❌ 连接测试失败: {e}")
+        return False
 
 
 def main():
@@ -523,6 +575,12 @@ def main():
         action="store_true",
         help="跳过需要 LLM/Embedding API 调用的测试"
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=16,
+        help="并发调用工具的最大数量 (默认: 16)"
+    )
     
     args = parser.parse_args()
     
@@ -535,13 +593,12 @@ def main():
         sys.exit(0 if success else 1)
     
     if args.list_tools:
-        asyncio.run(simple_connectivity_test(args.url))
-        asyncio.run(list_available_tools(args.url))
-        asyncio.run(list_prompts(args.url))
+        # 连接检查、工具和 prompts 列表共用一个会话，只握手和初始化一次
+        asyncio.run(list_all(args.url))
         sys.exit(0)
     
     # 完整测试
-    success = asyncio.run(test_mcp_server(args.url, skip_api=args.skip_api))
+    success = asyncio.run(test_mcp_server(args.url, skip_api=args.skip_api, concurrency=args.concurrency))
     
     sys.exit(0 if success else 1)
 
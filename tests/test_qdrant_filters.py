@@ -12,13 +12,18 @@ Mem0 1.0.0+ 声称支持以下操作符：
 此测试文件用于验证这些操作符在 Qdrant 后端的实际支持情况。
 """
 
+import argparse
 import os
 import sys
 import time
 import traceback
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
+import orjson
 from dotenv import load_dotenv
 
 # 加载 .env
@@ -30,8 +35,12 @@ load_dotenv(env_path)
 # 添加 src 到路径
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
+from mcp_ai_memory.cache import MemoizedEmbedder
 from mcp_ai_memory.config import create_mem0_client
 
+# 通用查询以匹配多条记忆，所有过滤器测试共用
+SEARCH_QUERY = "编程语言或爱好"
+
 
 def print_header(title: str):
     """打印标题。"""
@@ -52,20 +61,126 @@ def print_result(name: str, success: bool, message: str = ""):
     print(f"  {status} {name}{msg}")
 
 
+@dataclass
+class FilterResult:
+    """单个过滤器测试的结果。"""
+
+    name: str
+    operator_type: str
+    filters: Dict[str, Any]
+    success: bool = False
+    error: Optional[str] = None
+    error_type: Optional[str] = None
+    results_count: int = 0
+    results: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def extract_memories(result: Any) -> List[Dict[str, Any]]:
+    """从 Mem0 返回值中取出记忆列表，兼容 {"results": [...]} 和列表两种格式。"""
+    if isinstance(result, dict) and "results" in result:
+        return result.get("results", [])
+    if isinstance(result, list):
+        return result
+    return []
+
+
 class QdrantFilterTest:
     """Qdrant Filter 操作符测试类。"""
+
+    # 各节测试：(标题, [(测试名, 过滤器, 操作符类型), ...])
+    SECTIONS = [
+        ("1. 基础过滤器 - 简单等值匹配", [
+            ("简单字符串匹配", {"category": "programming"}, "scalar_match"),
+            ("简单布尔匹配", {"is_active": True}, "scalar_match"),
+            ("简单数字匹配", {"priority": 10}, "scalar_match"),
+        ]),
+        ("2. 比较操作符 - eq, ne, gt, gte, lt, lte", [
+            ("eq - 等于", {"category": {"eq": "programming"}}, "eq"),
+            ("ne - 不等于", {"category": {"ne": "programming"}}, "ne"),
+            ("gt - 大于", {"priority": {"gt": 7}}, "gt"),
+            ("gte - 大于等于", {"priority": {"gte": 8}}, "gte"),
+            ("lt - 小于", {"priority": {"lt": 8}}, "lt"),
+            ("lte - 小于等于", {"priority": {"lte": 7}}, "lte"),
+        ]),
+        ("3. 范围查询 - gte + lte 组合", [
+            ("范围查询 gte+lte", {"priority": {"gte": 5, "lte": 9}}, "range"),
+        ]),
+        ("4. 列表操作符 - in, nin", [
+            ("in - 包含在列表中", {"category": {"in": ["programming", "hobby"]}}, "in"),
+            ("nin - 不在列表中", {"category": {"nin": ["health"]}}, "nin"),
+        ]),
+        ("5. 字符串操作符 - contains, icontains", [
+            ("contains - 包含子串", {"tags": {"contains": "backend"}}, "contains"),
+            ("icontains - 不区分大小写包含", {"tags": {"icontains": "BACKEND"}}, "icontains"),
+        ]),
+        ("6. 通配符 - * (字段存在)", [
+            ("通配符 - 字段存在", {"language": "*"}, "wildcard"),
+        ]),
+        ("7. 逻辑操作符 - AND", [
+            ("AND - 多条件与", {
+                "AND": [
+                    {"category": "programming"},
+                    {"is_active": True}
+                ]
+            }, "AND"),
+            ("AND - 嵌套条件", {
+                "AND": [
+                    {"category": "programming"},
+                    {"priority": {"gte": 8}}
+                ]
+            }, "AND_nested"),
+        ]),
+        ("8. 逻辑操作符 - OR", [
+            ("OR - 多条件或", {
+                "OR": [
+                    {"category": "programming"},
+                    {"category": "hobby"}
+                ]
+            }, "OR"),
+        ]),
+        ("9. 逻辑操作符 - NOT", [
+            ("NOT - 排除条件", {
+                "NOT": [
+                    {"category": "health"}
+                ]
+            }, "NOT"),
+        ]),
+        ("10. 复杂嵌套逻辑", [
+            ("复杂嵌套 - AND+OR+NOT", {
+                "AND": [
+                    {
+                        "OR": [
+                            {"category": "programming"},
+                            {"category": "hobby"}
+                        ]
+                    },
+                    {"is_active": True},
+                    {
+                        "NOT": [
+                            {"priority": {"lt": 5}}
+                        ]
+                    }
+                ]
+            }, "complex_nested"),
+        ]),
+    ]
     
     def __init__(self):
         self.client = None
         self.test_user_id = f"filter_test_{os.getpid()}_{int(time.time())}"
-        self.test_results: Dict[str, Dict[str, Any]] = {}
+        self.test_results: List[FilterResult] = []
         
     def setup(self) -> bool:
         """初始化测试环境。"""
         print_section("初始化")
         try:
+            # 只测试向量库的 metadata 过滤；关闭图记忆，避免每次搜索都调用 LLM 提取实体
+            os.environ["ENABLE_GRAPH_MEMORY"] = "false"
             self.client = create_mem0_client()
             print_result("创建 Mem0 客户端", True)
+            if isinstance(self.client.embedding_model, MemoizedEmbedder):
+                # 预先计算一次查询向量，并发的搜索请求都直接命中缓存
+                self.client.embedding_model.embed(SEARCH_QUERY, "search")
             return True
         except Exception as e:
             print_result("创建 Mem0 客户端", False, str(e))
@@ -129,17 +244,30 @@ class QdrantFilterTest:
         ]
         
         try:
-            for i, item in enumerate(test_data):
-                result = self.client.add(
+            # 只验证 metadata 过滤，原文直接入库 (infer=False)，不经过 LLM 提取事实，
+            # 每条内容恰好对应一条记忆；各条互不依赖，并发写入
+            def add(item: Dict[str, Any]):
+                return self.client.add(
                     messages=[{"role": "user", "content": item["content"]}],
                     user_id=self.test_user_id,
                     metadata=item["metadata"],
+                    infer=False,
                 )
-                print_result(f"添加记忆 {i+1}: {item['content'][:30]}...", True)
+
+            with ThreadPoolExecutor(max_workers=len(test_data)) as executor:
+                for i, (item, _) in enumerate(zip(test_data, executor.map(add, test_data))):
+                    print_result(f"添加记忆 {i+1}: {item['content'][:30]}...", True)
             
-            # 等待索引
+            # 等待索引：轮询直到全部记忆可见，最多等待 5 秒
             print("  ⏳ 等待索引更新...")
-            time.sleep(2)
+            deadline = time.monotonic() + 5.0
+            while True:
+                visible = len(extract_memories(self.client.get_all(user_id=self.test_user_id)))
+                if visible >= len(test_data) or time.monotonic() >= deadline:
+                    break
+                time.sleep(0.05)
+            if visible < len(test_data):
+                print(f"  ⚠️  超时：仅 {visible}/{len(test_data)} 条记忆可见")
             return True
             
         except Exception as e:
@@ -152,268 +280,84 @@ class QdrantFilterTest:
         name: str, 
         filters: Dict[str, Any],
         operator_type: str,
-        expected_min_results: int = 0
-    ) -> Dict[str, Any]:
-        """测试单个过滤器。"""
-        result = {
-            "name": name,
-            "operator_type": operator_type,
-            "filters": filters,
-            "success": False,
-            "error": None,
-            "results_count": 0,
-            "results": [],
-        }
+        expected_min_results: int = 0,
+        collect_samples: bool = False,
+    ) -> FilterResult:
+        """测试单个过滤器。
+
+        默认只记录结果条数；collect_samples 为 True 时才保留前 3 条结果用于显示。
+        """
+        result = FilterResult(name=name, operator_type=operator_type, filters=filters)
         
         try:
             search_result = self.client.search(
-                query="编程语言或爱好",  # 通用查询以匹配多条记忆
+                query=SEARCH_QUERY,
                 user_id=self.test_user_id,
                 filters=filters,
                 limit=10,
             )
             
-            # 处理结果
-            if isinstance(search_result, dict) and "results" in search_result:
-                memories = search_result.get("results", [])
-            elif isinstance(search_result, list):
-                memories = search_result
-            else:
-                memories = []
+            memories = extract_memories(search_result)
             
-            result["success"] = True
-            result["results_count"] = len(memories)
-            result["results"] = [
-                {
-                    "memory": m.get("memory", ""),
-                    "metadata": m.get("metadata", {}),
-                }
-                for m in memories[:3]  # 只保留前3条用于显示
-            ]
+            result.success = True
+            result.results_count = len(memories)
+            if collect_samples:
+                result.results = [
+                    {
+                        "memory": m.get("memory", ""),
+                        "metadata": m.get("metadata", {}),
+                    }
+                    for m in memories[:3]  # 只保留前3条用于显示
+                ]
             
             return result
             
         except Exception as e:
-            result["error"] = str(e)
-            result["error_type"] = type(e).__name__
+            result.error = str(e)
+            result.error_type = type(e).__name__
             return result
     
-    def run_all_tests(self):
-        """运行所有过滤器测试。"""
-        
-        # ============================================================
-        # 1. 基础过滤器 - 简单等值匹配
-        # ============================================================
-        print_header("1. 基础过滤器 - 简单等值匹配")
-        
-        basic_tests = [
-            ("简单字符串匹配", {"category": "programming"}, "scalar_match"),
-            ("简单布尔匹配", {"is_active": True}, "scalar_match"),
-            ("简单数字匹配", {"priority": 10}, "scalar_match"),
-        ]
-        
-        for name, filters, op_type in basic_tests:
-            result = self.test_filter(name, filters, op_type)
-            self.test_results[name] = result
-            if result["success"]:
-                print_result(name, True, f"返回 {result['results_count']} 条结果")
-            else:
-                print_result(name, False, result.get("error", "未知错误"))
-        
-        # ============================================================
-        # 2. 比较操作符 - eq, ne, gt, gte, lt, lte
-        # ============================================================
-        print_header("2. 比较操作符 - eq, ne, gt, gte, lt, lte")
-        
-        comparison_tests = [
-            ("eq - 等于", {"category": {"eq": "programming"}}, "eq"),
-            ("ne - 不等于", {"category": {"ne": "programming"}}, "ne"),
-            ("gt - 大于", {"priority": {"gt": 7}}, "gt"),
-            ("gte - 大于等于", {"priority": {"gte": 8}}, "gte"),
-            ("lt - 小于", {"priority": {"lt": 8}}, "lt"),
-            ("lte - 小于等于", {"priority": {"lte": 7}}, "lte"),
-        ]
-        
-        for name, filters, op_type in comparison_tests:
-            result = self.test_filter(name, filters, op_type)
-            self.test_results[name] = result
-            if result["success"]:
-                print_result(name, True, f"返回 {result['results_count']} 条结果")
-            else:
-                print_result(name, False, result.get("error", "未知错误")[:80])
-        
-        # ============================================================
-        # 3. 范围查询 - gte + lte 组合
-        # ============================================================
-        print_header("3. 范围查询 - gte + lte 组合")
-        
-        range_tests = [
-            ("范围查询 gte+lte", {"priority": {"gte": 5, "lte": 9}}, "range"),
-        ]
-        
-        for name, filters, op_type in range_tests:
-            result = self.test_filter(name, filters, op_type)
-            self.test_results[name] = result
-            if result["success"]:
-                print_result(name, True, f"返回 {result['results_count']} 条结果")
-            else:
-                print_result(name, False, result.get("error", "未知错误")[:80])
-        
-        # ============================================================
-        # 4. 列表操作符 - in, nin
-        # ============================================================
-        print_header("4. 列表操作符 - in, nin")
-        
-        list_tests = [
-            ("in - 包含在列表中", {"category": {"in": ["programming", "hobby"]}}, "in"),
-            ("nin - 不在列表中", {"category": {"nin": ["health"]}}, "nin"),
-        ]
-        
-        for name, filters, op_type in list_tests:
-            result = self.test_filter(name, filters, op_type)
-            self.test_results[name] = result
-            if result["success"]:
-                print_result(name, True, f"返回 {result['results_count']} 条结果")
-            else:
-                print_result(name, False, result.get("error", "未知错误")[:80])
-        
-        # ============================================================
-        # 5. 字符串操作符 - contains, icontains
-        # ============================================================
-        print_header("5. 字符串操作符 - contains, icontains")
-        
-        string_tests = [
-            ("contains - 包含子串", {"tags": {"contains": "backend"}}, "contains"),
-            ("icontains - 不区分大小写包含", {"tags": {"icontains": "BACKEND"}}, "icontains"),
-        ]
-        
-        for name, filters, op_type in string_tests:
-            result = self.test_filter(name, filters, op_type)
-            self.test_results[name] = result
-            if result["success"]:
-                print_result(name, True, f"返回 {result['results_count']} 条结果")
-            else:
-                print_result(name, False, result.get("error", "未知错误")[:80])
-        
-        # ============================================================
-        # 6. 通配符 - *
-        # ============================================================
-        print_header("6. 通配符 - * (字段存在)")
-        
-        wildcard_tests = [
-            ("通配符 - 字段存在", {"language": "*"}, "wildcard"),
-        ]
-        
-        for name, filters, op_type in wildcard_tests:
-            result = self.test_filter(name, filters, op_type)
-            self.test_results[name] = result
-            if result["success"]:
-                print_result(name, True, f"返回 {result['results_count']} 条结果")
-            else:
-                print_result(name, False, result.get("error", "未知错误")[:80])
-        
-        # ============================================================
-        # 7. 逻辑操作符 - AND
-        # ============================================================
-        print_header("7. 逻辑操作符 - AND")
-        
-        and_tests = [
-            ("AND - 多条件与", {
-                "AND": [
-                    {"category": "programming"},
-                    {"is_active": True}
-                ]
-            }, "AND"),
-            ("AND - 嵌套条件", {
-                "AND": [
-                    {"category": "programming"},
-                    {"priority": {"gte": 8}}
-                ]
-            }, "AND_nested"),
-        ]
-        
-        for name, filters, op_type in and_tests:
-            result = self.test_filter(name, filters, op_type)
-            self.test_results[name] = result
-            if result["success"]:
-                print_result(name, True, f"返回 {result['results_count']} 条结果")
-            else:
-                print_result(name, False, result.get("error", "未知错误")[:80])
-        
-        # ============================================================
-        # 8. 逻辑操作符 - OR
-        # ============================================================
-        print_header("8. 逻辑操作符 - OR")
-        
-        or_tests = [
-            ("OR - 多条件或", {
-                "OR": [
-                    {"category": "programming"},
-                    {"category": "hobby"}
-                ]
-            }, "OR"),
-        ]
-        
-        for name, filters, op_type in or_tests:
-            result = self.test_filter(name, filters, op_type)
-            self.test_results[name] = result
-            if result["success"]:
-                print_result(name, True, f"返回 {result['results_count']} 条结果")
-            else:
-                print_result(name, False, result.get("error", "未知错误")[:80])
-        
-        # ============================================================
-        # 9. 逻辑操作符 - NOT
-        # ============================================================
-        print_header("9. 逻辑操作符 - NOT")
-        
-        not_tests = [
-            ("NOT - 排除条件", {
-                "NOT": [
-                    {"category": "health"}
-                ]
-            }, "NOT"),
-        ]
-        
-        for name, filters, op_type in not_tests:
-            result = self.test_filter(name, filters, op_type)
-            self.test_results[name] = result
-            if result["success"]:
-                print_result(name, True, f"返回 {result['results_count']} 条结果")
-            else:
-                print_result(name, False, result.get("error", "未知错误")[:80])
-        
-        # ============================================================
-        # 10. 复杂嵌套逻辑
-        # ============================================================
-        print_header("10. 复杂嵌套逻辑")
-        
-        complex_tests = [
-            ("复杂嵌套 - AND+OR+NOT", {
-                "AND": [
-                    {
-                        "OR": [
-                            {"category": "programming"},
-                            {"category": "hobby"}
-                        ]
-                    },
-                    {"is_active": True},
-                    {
-                        "NOT": [
-                            {"priority": {"lt": 5}}
-                        ]
-                    }
-                ]
-            }, "complex_nested"),
-        ]
-        
-        for name, filters, op_type in complex_tests:
-            result = self.test_filter(name, filters, op_type)
-            self.test_results[name] = result
-            if result["success"]:
-                print_result(name, True, f"返回 {result['results_count']} 条结果")
+    def run_all_tests(self, concurrent_queries: int = 8, verbose: bool = False):
+        """运行所有过滤器测试。
+
+        各测试之间互不依赖，先全部提交到线程池并发执行，
+        再按声明顺序逐节打印结果。
+
+        Args:
+            concurrent_queries: 同时进行的搜索请求数量，1 表示顺序执行。
+            verbose: 是否打印每个测试返回的前 3 条结果。
+        """
+        with ThreadPoolExecutor(max_workers=max(1, concurrent_queries)) as executor:
+            futures = {
+                name: executor.submit(
+                    self.test_filter, name, filters, op_type, collect_samples=verbose
+                )
+                for _, tests in self.SECTIONS
+                for name, filters, op_type in tests
+            }
+            for title, tests in self.SECTIONS:
+                self._run_section(title, tests, futures)
+
+    def _run_section(
+        self,
+        title: str,
+        tests: List[Tuple[str, Dict[str, Any], str]],
+        futures: Dict[str, "Future[FilterResult]"],
+    ):
+        """等待一节测试完成，记录并打印结果。
+
+        结果只在主线程中写入 test_results，无需加锁。
+        """
+        print_header(title)
+        for name, _, _ in tests:
+            result = futures[name].result()
+            self.test_results.append(result)
+            if result.success:
+                print_result(name, True, f"返回 {result.results_count} 条结果")
+                for sample in result.results:
+                    print(f"      - {sample['memory'][:40]} {orjson.dumps(sample['metadata']).decode()}")
             else:
-                print_result(name, False, result.get("error", "未知错误")[:80])
+                print_result(name, False, (result.error or "未知错误")[:80])
     
     def cleanup(self):
         """清理测试数据。
@@ -424,21 +368,27 @@ class QdrantFilterTest:
         print_section("清理测试数据")
         try:
             # 获取测试用户的所有记忆
-            memories = self.client.get_all(user_id=self.test_user_id)
+            memories = extract_memories(self.client.get_all(user_id=self.test_user_id))
             if not memories:
                 print_result("删除测试记忆", True, "没有需要删除的记忆")
                 return
             
-            # 逐条删除
+            # 逐条删除，各条删除互不依赖，并发执行
+            def delete(mem_id: str) -> Optional[Exception]:
+                try:
+                    self.client.delete(memory_id=mem_id)
+                    return None
+                except Exception as e:
+                    return e
+
+            mem_ids = [mem["id"] for mem in memories if mem.get("id")]
             deleted_count = 0
-            for mem in memories:
-                mem_id = mem.get("id")
-                if mem_id:
-                    try:
-                        self.client.delete(memory_id=mem_id)
+            with ThreadPoolExecutor(max_workers=16) as executor:
+                for mem_id, error in zip(mem_ids, executor.map(delete, mem_ids)):
+                    if error is None:
                         deleted_count += 1
-                    except Exception as e:
-                        print_result(f"删除记忆 {mem_id}", False, str(e))
+                    else:
+                        print_result(f"删除记忆 {mem_id}", False, str(error))
             
             print_result("删除测试记忆", True, f"已删除 {deleted_count}/{len(memories)} 条")
         except Exception as e:
@@ -448,18 +398,12 @@ class QdrantFilterTest:
         """打印测试摘要。"""
         print_header("测试摘要")
         
-        # 按操作符类型分组
-        operator_groups = {}
-        for name, result in self.test_results.items():
-            op_type = result.get("operator_type", "unknown")
-            if op_type not in operator_groups:
-                operator_groups[op_type] = {"pass": 0, "fail": 0, "tests": []}
-            
-            if result["success"]:
-                operator_groups[op_type]["pass"] += 1
-            else:
-                operator_groups[op_type]["fail"] += 1
-            operator_groups[op_type]["tests"].append((name, result))
+        # 按操作符类型统计通过/失败数，表格按首次出现的顺序输出
+        pass_counts: Counter[str] = Counter()
+        fail_counts: Counter[str] = Counter()
+        for result in self.test_results:
+            (pass_counts if result.success else fail_counts)[result.operator_type] += 1
+        operator_types = dict.fromkeys(result.operator_type for result in self.test_results)
         
         # 打印摘要表格
         print("\n操作符支持情况:")
@@ -467,47 +411,36 @@ class QdrantFilterTest:
         print(f"{'操作符类型':<20} {'通过':<10} {'失败':<10} {'状态':<10}")
         print("-" * 60)
         
-        total_pass = 0
-        total_fail = 0
-        
-        for op_type, stats in operator_groups.items():
-            status = "✅ 支持" if stats["fail"] == 0 else "❌ 不支持"
-            print(f"{op_type:<20} {stats['pass']:<10} {stats['fail']:<10} {status:<10}")
-            total_pass += stats["pass"]
-            total_fail += stats["fail"]
+        for op_type in operator_types:
+            status = "✅ 支持" if fail_counts[op_type] == 0 else "❌ 不支持"
+            print(f"{op_type:<20} {pass_counts[op_type]:<10} {fail_counts[op_type]:<10} {status:<10}")
+        total_pass = sum(pass_counts.values())
+        total_fail = sum(fail_counts.values())
         
         print("-" * 60)
         print(f"{'总计':<20} {total_pass:<10} {total_fail:<10}")
         print()
         
         # 打印失败详情
-        failed_tests = [
-            (name, result) 
-            for name, result in self.test_results.items() 
-            if not result["success"]
-        ]
+        failed_tests = [result for result in self.test_results if not result.success]
         
         if failed_tests:
             print("\n失败的测试详情:")
             print("-" * 60)
-            for name, result in failed_tests:
-                print(f"\n❌ {name}")
-                print(f"   过滤器: {result['filters']}")
-                print(f"   错误类型: {result.get('error_type', 'Unknown')}")
-                print(f"   错误信息: {result.get('error', 'N/A')[:200]}")
+            for result in failed_tests:
+                print(f"\n❌ {result.name}")
+                print(f"   过滤器: {orjson.dumps(result.filters).decode()}")
+                print(f"   错误类型: {result.error_type or 'Unknown'}")
+                print(f"   错误信息: {(result.error or 'N/A')[:200]}")
         
         # 打印成功的测试
-        passed_tests = [
-            (name, result) 
-            for name, result in self.test_results.items() 
-            if result["success"]
-        ]
+        passed_tests = [result for result in self.test_results if result.success]
         
         if passed_tests:
             print("\n成功的测试:")
             print("-" * 60)
-            for name, result in passed_tests:
-                print(f"✅ {name}: 返回 {result['results_count']} 条结果")
+            for result in passed_tests:
+                print(f"✅ {result.name}: 返回 {result.results_count} 条结果")
         
         # 最终结论
         print("\n" + "=" * 60)
@@ -524,6 +457,20 @@ class QdrantFilterTest:
 
 def main():
     """主函数。"""
+    parser = argparse.ArgumentParser(description="验证 Mem0 + Qdrant 的 Filter 操作符支持情况")
+    parser.add_argument(
+        "--concurrent-queries",
+        type=int,
+        default=8,
+        help="同时进行的搜索请求数量，1 表示顺序执行 (默认: 8)"
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="打印每个测试返回的前 3 条结果"
+    )
+    args = parser.parse_args()
+    
     print_header("Mem0 + Qdrant Filter 操作符验证测试")
     
     print("\n配置信息:")
@@ -546,7 +493,7 @@ def main():
     
     try:
         # 运行所有测试
-        tester.run_all_tests()
+        tester.run_all_tests(args.concurrent_queries, args.verbose)
         
         # 打印摘要
         tester.print_summary()